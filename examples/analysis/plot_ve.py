@@ -15,6 +15,7 @@ sys.path.append(os.path.sep.join([os.getcwd(), '']))
 import matplotlib.pyplot as plt
 import numpy as np
 
+from src.core.fiberset import FiberSetCoords
 from src.core.query import Query
 from src.utils import Object
 
@@ -42,7 +43,7 @@ for t, (p_i, _) in enumerate(sim_object.master_product_indices):
 active_src_ind, fiberset_ind = sim_object.potentials_product[potentials_ind]
 master_fiber_ind = sim_object.indices_n_to_fib(fiberset_index=fiberset_ind, inner_index=inner, local_fiber_index=fiber)
 
-fiber_coords_path = os.path.join(
+fiberset_path = os.path.join(
     'samples',
     str(sample),
     'models',
@@ -51,9 +52,8 @@ fiber_coords_path = os.path.join(
     str(sim),
     'fibersets',
     str(fiberset_ind),
-    f'{master_fiber_ind}.dat',
 )
-z_coords = np.loadtxt(fiber_coords_path, skiprows=1)[:, 2]
+z_coords = FiberSetCoords(fiberset_path).z(master_fiber_ind)
 
 plt.plot(z_coords, dpve1[1:], 'r-', label='p1')
 plt.ylabel('Ve (V)')
@@ -15,10 +15,12 @@ from src.core.nerve import Nerve
 from src.core.deformable import Deformable
 from src.core.sample import Sample
 from src.core.mock_sample import MockSample
-from src.core.simulation import Simulation
+from src.core.simulation import Simulation, SupersampledBases
 from src.core.waveform import Waveform
-from src.core.fiberset import FiberSet
+from src.core.fiberset import FiberSet, FiberSetCoords
 from src.core.hocwriter import HocWriter
+from src.core.config_catalogue import ConfigCatalogue
+from src.core.results_index import ResultsIndex
 from src.core.query import Query
 from src.core.model import Model
 from src.core import plotter
@@ -35,9 +37,13 @@ __all__ = [
     'MockSample',
     'Deformable',
     'Simulation',
+    'SupersampledBases',
     'Waveform',
     'FiberSet',
+    'FiberSetCoords',
     'HocWriter',
+    'ConfigCatalogue',
+    'ResultsIndex',
     'Query',
     'plotter',
 ]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3.7
+
+"""Defines ConfigCatalogue class.
+
+The copyrights of this software are owned by Duke University.
+Please refer to the LICENSE and README.md files for licensing
+instructions. The source code can be found on the following GitHub
+repository: https://github.com/wmglab-duke/ascent
+"""
+
+import json
+import os
+import sqlite3
+
+
+class ConfigCatalogue:
+    """Catalogue of the flattened JSON configs (e.g., sample.json, model.json, sims) for answering Query criteria.
+
+    Each config is kept in a SQLite table as its flattened key paths (every nested key, as a tuple) to their values,
+    indexed by key path, and is parsed again only if its file was modified. Looking up the values at the key paths of
+    criteria then does not read the configs themselves.
+
+    IMPORTANT: like Query, paths are relative to the project level
+    """
+
+    # hidden, as the directories of samples/ are listed as samples
+    default_path = os.path.join('samples', '.config_catalogue.db')
+
+    def __init__(self, path: str = None):
+        """Open (and create if needed) the catalogue.
+
+        :param path: path to the catalogue database, defaults to ConfigCatalogue.default_path
+        """
+        self.path = path if path is not None else self.default_path
+        self.connection = sqlite3.connect(self.path)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS configs (path TEXT PRIMARY KEY, mtime INTEGER)')
+            # the primary key doubles as the index of the values at each key path
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS config_values (key TEXT, path TEXT, value TEXT, PRIMARY KEY (key, path))'
+            )
+            self.connection.execute('CREATE INDEX IF NOT EXISTS config_values_path ON config_values (path)')
+
+        # modification times of the catalogued configs, the configs checked against their files since the catalogue
+        # was opened, and the values looked up since
+        self._mtimes: dict[str, int] = dict(self.connection.execute('SELECT path, mtime FROM configs').fetchall())
+        self._refreshed: set[str] = set()
+        self._values: dict[tuple, dict[str, object]] = {}
+
+    def close(self):
+        """Close the connection to the catalogue database."""
+        self.connection.close()
+
+    @staticmethod
+    def flatten(config: dict, prefix: tuple = ()) -> dict[tuple, object]:
+        """Flatten a config to its key paths.
+
+        :param config: config (or part of a config) to flatten
+        :param prefix: key path of config
+        :return: every key path (including those to dicts) to its value
+        """
+        flat = {}
+        for key, value in config.items():
+            flat[(*prefix, key)] = value
+            if isinstance(value, dict):
+                flat.update(ConfigCatalogue.flatten(value, (*prefix, key)))
+        return flat
+
+    def refresh(self, config_paths: list[str]):
+        """Catalogue the configs that were modified since they were catalogued (or never were).
+
+        :param config_paths: paths to the configs
+        """
+        config_paths = [path for path in config_paths if path not in self._refreshed]
+        if len(config_paths) == 0:
+            return
+        self._refreshed.update(config_paths)
+
+        modified = [(path, os.stat(path).st_mtime_ns) for path in config_paths]
+        modified = [(path, mtime) for path, mtime in modified if self._mtimes.get(path) != mtime]
+        if len(modified) == 0:
+            return
+
+        rows = []
+        for path, _ in modified:
+            with open(path) as handle:
+                config = json.load(handle)
+            # values of dicts are not kept, their key paths are
+            rows.extend(
+                (json.dumps(key_path), path, None if isinstance(value, dict) else json.dumps(value))
+                for key_path, value in self.flatten(config).items()
+            )
+
+        with self.connection:
+            self.connection.executemany(
+                'DELETE FROM config_values WHERE path = ?', [(path,) for path, _ in modified if path in self._mtimes]
+            )
+            self.connection.executemany('INSERT OR REPLACE INTO config_values VALUES (?, ?, ?)', rows)
+            self.connection.executemany('INSERT OR REPLACE INTO configs VALUES (?, ?)', modified)
+        self._mtimes.update(modified)
+        self._values.clear()
+
+    def values(self, key_path: tuple) -> dict[str, object]:
+        """Get the values at a key path of every catalogued config.
+
+        :param key_path: key path
+        :return: config paths to their values at the key path (empty dicts for dicts), for the configs that have it
+        """
+        if key_path not in self._values:
+            self._values[key_path] = {
+                path: {} if value is None else json.loads(value)
+                for path, value in self.connection.execute(
+                    'SELECT path, value FROM config_values WHERE key = ?', (json.dumps(key_path),)
+                )
+            }
+        return self._values[key_path]
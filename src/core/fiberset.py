@@ -11,6 +11,7 @@ repository: https://github.com/wmglab-duke/ascent
 import csv
 import os
 import random
+import re
 import shutil
 import warnings
 
@@ -147,21 +148,29 @@ class FiberSet(Configurable, Saveable):
 
         return self
 
-    def write(self, mode: WriteMode, path: str):
+    def write(self, mode: WriteMode, path: str, columnar: bool = False):
         """Write the fiberset to file.
 
+        The coordinates of all fibers are written to a columnar store (see FiberSetCoords). Unless columnar, each
+        fiber is also written to its own file (which can otherwise be derived with FiberSetCoords.write_fiber_files).
+
         :param mode: Type of file to write to.
         :param path: Path to the file to write to.
+        :param columnar: If True, only write the columnar store of the coordinates (no file per fiber).
         :raises ValueError: If some fibers have diameter attribute and others do not.
         :return: self
         """
         diams = []
         offset_ratios = []
+        fibers_coords = []
         for i, fiber in enumerate(self.fibers if self.fibers is not None else []):
             diams.append(fiber['diam'])
             z_coords = fiber['fiber']
+            fibers_coords.append(z_coords)
             offset_ratios.append(fiber['offset_ratio'])
             os.makedirs(path, exist_ok=True)
+            if columnar:
+                continue
 
             with open(
                 os.path.join(path, str(i) + WriteMode.file_endings.value[mode.value]),
@@ -175,6 +184,10 @@ class FiberSet(Configurable, Saveable):
                         f.write(str(row) + ' ')
                     f.write("\n")
 
+        # columnar store of the coordinates of all fibers, for fast readers (see FiberSetCoords)
+        if fibers_coords:
+            FiberSetCoords.write(path, fibers_coords)
+
         if diams.count(None) == 0:
             diams_key_path = os.path.join(path, 'diams.txt')
             with open(diams_key_path, "w") as f2:
@@ -1174,3 +1187,108 @@ class FiberSet(Configurable, Saveable):
         else:
             for f, (x, y) in zip(self.fibers, xy_points):
                 f[z_index] = (x, y, f[z_index][2])
+
+
+class FiberSetCoords:
+    """Coordinates of all fibers in a fiberset, stored by column in a single array.
+
+    The coordinates of fiber i are columns offsets[i]:offsets[i + 1] of coords (rows are x, y, z), so the coordinates
+    (or only the z-coordinates) of any fiber are a view of the array, without copying. The array is memory mapped from
+    coords.npy (with coords_offsets.npy) in the fiberset directory. Fibersets written before the columnar store are
+    read from their fiber files instead.
+    """
+
+    coords_file = 'coords.npy'
+    offsets_file = 'coords_offsets.npy'
+
+    def __init__(self, path: str):
+        """Load the coordinates of a fiberset.
+
+        :param path: directory of the fiberset (e.g., fibersets/<fiberset_index> or ss_coords)
+        """
+        if self.exists(path):
+            self.coords = np.load(os.path.join(path, self.coords_file), mmap_mode='r')
+            self.offsets = np.load(os.path.join(path, self.offsets_file))
+        else:
+            fiber_files = sorted(
+                (file for file in os.listdir(path) if re.match('[0-9]+\\.dat$', file)),
+                key=lambda file: int(file.split('.')[0]),
+            )
+            fibers_coords = [np.loadtxt(os.path.join(path, file), skiprows=1, ndmin=2) for file in fiber_files]
+            self.coords, self.offsets = self.stack(fibers_coords)
+
+    def __len__(self) -> int:
+        """Get the number of fibers.
+
+        :return: number of fibers in the fiberset
+        """
+        return len(self.offsets) - 1
+
+    def fiber(self, fiber_ind: int) -> np.ndarray:
+        """Get the coordinates of a fiber.
+
+        :param fiber_ind: index of the fiber in the fiberset
+        :return: coordinates (number of coordinates x 3), a view of the fiberset coordinates
+        """
+        return self.coords[:, self.offsets[fiber_ind] : self.offsets[fiber_ind + 1]].T
+
+    def z(self, fiber_ind: int) -> np.ndarray:
+        """Get the z-coordinates of a fiber.
+
+        :param fiber_ind: index of the fiber in the fiberset
+        :return: z-coordinates, a contiguous view of the fiberset coordinates
+        """
+        return self.coords[2, self.offsets[fiber_ind] : self.offsets[fiber_ind + 1]]
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Check if the columnar coordinates of a fiberset have been written.
+
+        :param path: directory of the fiberset
+        :return: True if the columnar coordinates exist
+        """
+        return os.path.exists(os.path.join(path, FiberSetCoords.coords_file)) and os.path.exists(
+            os.path.join(path, FiberSetCoords.offsets_file)
+        )
+
+    @staticmethod
+    def stack(fibers_coords: list) -> tuple[np.ndarray, np.ndarray]:
+        """Stack the coordinates of many fibers by column.
+
+        :param fibers_coords: coordinates of each fiber (number of coordinates x 3)
+        :return: coords (3 x total number of coordinates), offsets (length n_fibers + 1)
+        """
+        fibers_coords = [np.asarray(fiber_coords, dtype=float).reshape(-1, 3) for fiber_coords in fibers_coords]
+        offsets = np.concatenate(([0], np.cumsum([len(fiber_coords) for fiber_coords in fibers_coords]))).astype(int)
+        coords = np.empty((3, offsets[-1]))
+        for fiber_coords, start, stop in zip(fibers_coords, offsets[:-1], offsets[1:]):
+            coords[:, start:stop] = fiber_coords.T
+        return coords, offsets
+
+    def write_fiber_files(self, path: str, overwrite: bool = False):
+        """Write the coordinates of each fiber to its own file, as written by FiberSet.write (e.g., for COMSOL).
+
+        :param path: directory to write the fiber files to (e.g., the fiberset directory)
+        :param overwrite: If False, fiber files that already exist are not rewritten.
+        """
+        os.makedirs(path, exist_ok=True)
+        for fiber_ind in range(len(self)):
+            fiber_path = os.path.join(path, str(fiber_ind) + WriteMode.file_endings.value[WriteMode.DATA.value])
+            if os.path.exists(fiber_path) and not overwrite:
+                continue
+            fiber_coords = self.fiber(fiber_ind).tolist()
+            lines = [f'{len(fiber_coords)} '] + [f'{x} {y} {z} ' for x, y, z in fiber_coords]
+            with open(fiber_path, 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+
+    @staticmethod
+    def write(path: str, fibers_coords: list):
+        """Write the columnar coordinates of a fiberset.
+
+        :param path: directory of the fiberset
+        :param fibers_coords: coordinates of each fiber (number of coordinates x 3)
+        """
+        coords, offsets = FiberSetCoords.stack(fibers_coords)
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, FiberSetCoords.coords_file), coords)
+        np.save(os.path.join(path, FiberSetCoords.offsets_file), offsets)
@@ -19,6 +19,7 @@ from src.utils import (
     Config,
     Configurable,
     FiberGeometry,
+    InputsFormat,
     MyelinationMode,
     NeuronRunMode,
     Saveable,
@@ -171,6 +172,10 @@ class HocWriter(Configurable, Saveable):
         rec_cuff_present = int(bool(self.search(Config.SIM, "active_recs", optional=True)))
         file_object.write(f"flag_extracellular_rec = {rec_cuff_present} // Set to zero for off; one for on \n")
         file_object.write(f"flag_whichstim = {0} // Set to zero for off; one for on \n")
+        binary_inputs = int(self.search(Config.SIM, "inputs_format", optional=True) == InputsFormat.BINARY.name)
+        file_object.write(
+            f"flag_binary_inputs = {binary_inputs} // Set to zero for Ve(x) text files; one for binary potentials\n"
+        )
 
     def write_classification_checkpoints(self, file_object):
         """Write classification checkpoints to launch.hoc.
@@ -271,6 +276,8 @@ class HocWriter(Configurable, Saveable):
                 file_object.write(f"\nrel_thresh_resoln = {res / 100:0.4f}\n")
             file_object.write(f"termination_flag = {termination_flag:0.0f} // \n")
 
+            early_stop_flag = self.write_early_stop(file_object)
+
             max_iter = self.search(Config.SIM, "protocol", "bounds_search").get("max_steps", 100)
             file_object.write(f"max_iter = {max_iter:0.0f} // \n")
 
@@ -297,6 +304,7 @@ class HocWriter(Configurable, Saveable):
             file_object.write(f"ap_detect_location  = {ap_detect_location:0.2f}\n")
             find_thresh = 0
             block_thresh_flag = 0
+            early_stop_flag = 0
             amps = self.search(Config.SIM, "protocol", "amplitudes")
             num_amps = len(amps)
             file_object.write("\n//***************** Batching Parameters **********\n")
@@ -315,6 +323,28 @@ class HocWriter(Configurable, Saveable):
             "// If find_thresh==1, can also set find_block_thresh = 1 "
             "to find block thresholds instead of activation threshold\n"
         )
+        file_object.write(
+            f"early_stop_flag = {early_stop_flag} "
+            "// If find_thresh==1, can also set early_stop_flag = 1 to stop each run once N_APs is known\n"
+        )
+
+    def write_early_stop(self, file_object):
+        """Write the early stop parameters of the threshold search to launch.hoc.
+
+        Each run of the threshold search stops once its outcome is known: an AP at ap_detect_location (or, for block
+        thresholds, an AP after the start of the test pulses), or, once the stimulation has ended, Vm within
+        "rest_tolerance" of its resting value at all nodes for "rest_duration". The final run at threshold stops early
+        only if no time course is saved (see saving_time_course in Wrapper.hoc).
+
+        :param file_object: File object to write to.
+        :return: The early_stop_flag, 1 if "early_stop" is defined in the protocol, else 0.
+        """
+        early_stop: dict = self.search(Config.SIM, "protocol", "early_stop", optional=True)
+        if early_stop is None:
+            return 0
+        file_object.write(f"\nearly_stop_rest_tol = {early_stop.get('rest_tolerance', 1):0.4f} // [mV]\n")
+        file_object.write(f"early_stop_rest_dur = {early_stop.get('rest_duration', 2):0.4f} // [ms]\n")
+        return 1
 
     def write_saving(self, fiber_model_info, file_object):
         """Write the saving section of the hoc file.
@@ -3,7 +3,6 @@
 See ``examples/analysis`` for examples of how to use.
 """
 
-import glob
 import json
 import os
 import warnings
@@ -15,7 +14,7 @@ import matplotlib.ticker as tick
 import numpy as np
 import pandas as pd
 
-from src.core import Query
+from src.core import FiberSetCoords, Query
 from src.utils import Config, Object
 
 
@@ -353,7 +352,9 @@ def ap_loctime(  # noqa: C901
             for sim_index in model_results.get('sims', []):
                 print(f'\t\tsim: {sim_index}')
 
-                sim_object = query_object.get_object(Object.SIMULATION, [sample_index, model_index, sim_index])
+                sim_object = query_object.get_object(
+                    Object.SIMULATION, [sample_index, model_index, sim_index], cache=query_object.object_cache
+                )
 
                 if subplots is True:
                     fig, axs = plt.subplots(ncols=len(sim_object.master_product_indices), nrows=2, sharey="row")
@@ -388,7 +389,7 @@ def ap_loctime(  # noqa: C901
                     # path of the first inner, first fiber vm(t) data
                     inner = 0
                     if plot_distribution:
-                        fiber_indices = len(glob.glob(fiberset_dir + '/*.dat'))
+                        fiber_indices = range(len(FiberSetCoords(fiberset_dir)))
                     else:
                         fiber_indices = [0]
                     ap_nodes = []
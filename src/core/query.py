@@ -8,17 +8,20 @@ instructions. The source code can be found on the following GitHub
 repository: https://github.com/wmglab-duke/ascent
 """
 
+import itertools
 import os
 import pickle
 import struct
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 
 import numpy as np
 import pandas as pd
 from scipy import stats as stats
 
-from src.core import Sample, Simulation, Slide
-from src.utils import Config, Configurable, Object, Saveable, SetupMode
+from src.core import ConfigCatalogue, ResultsIndex, Sample, Simulation, Slide
+from src.utils import Config, Configurable, Object, ObjectCache, Saveable, SetupMode
 
 
 class Query(Configurable, Saveable):
@@ -27,14 +30,22 @@ class Query(Configurable, Saveable):
     IMPORTANT: MUST BE RUN FROM PROJECT LEVEL
     """
 
-    def __init__(self, criteria: str | dict):
+    # objects cache shared by the Query objects created with share_objects=True
+    shared_objects = ObjectCache()
+
+    def __init__(self, criteria: str | dict, object_cache_size: int = 16, share_objects: bool = False):
         """Set up Query object.
 
         :param criteria: dictionary of search criteria
+        :param object_cache_size: number of sample.obj and sim.obj objects kept in memory by the analysis methods
+        :param share_objects: if True, use the cache of objects shared by Query objects (Query.shared_objects)
+            instead of a cache for this Query only (object_cache_size is then ignored)
         """
         # set up superclasses
         Configurable.__init__(self)
 
+        self.object_cache = Query.shared_objects if share_objects else ObjectCache(object_cache_size)
+
         self._ran: bool = False  # marker will be set to True one self.run() is called (as is successful)
 
         if isinstance(criteria, str):
@@ -82,6 +93,40 @@ class Query(Configurable, Saveable):
         # control if missing sim criteria or both sim and model criteria
         include_downstream = self.search(Config.CRITERIA, 'include_downstream', optional=True)
 
+        # configs are parsed again only if modified since the last run, and only their values for criteria are read
+        catalogue = ConfigCatalogue() if any((sample_criteria, model_criteria, sim_criteria)) else None
+        matched: dict[str, bool] = {}
+
+        def matching(names: list[str], config_path: Callable[[str], str], criteria: dict | None) -> list[str]:
+            """Filter samples, models, or sims by the criteria for their configs (as Query._match would).
+
+            :param names: names of the directories of the samples, models, or sims
+            :param config_path: function of a name to the path of its config
+            :param criteria: criteria for their configs, or None to keep them all
+            :raises KeyError: if a key of the criteria is not in a config
+            :return: names of those whose configs match the criteria
+            """
+            if criteria is None:
+                return names
+            config_paths = [config_path(name) for name in names]
+            catalogue.refresh(config_paths)
+
+            # criteria values, and the keys that must be in the configs (empty dicts), in the order _match checks them
+            leaves = [(key_path, value) for key_path, value in ConfigCatalogue.flatten(criteria).items()]
+            leaves = [(key_path, value) for key_path, value in leaves if not isinstance(value, dict) or value == {}]
+            for path in config_paths:
+                # each config is matched once per run (e.g., a sim config for every model)
+                if path in matched:
+                    continue
+                matched[path] = True
+                for key_path, c_val in leaves:
+                    if path not in catalogue.values(key_path):
+                        raise KeyError(f"Criterion key {'->'.join(key_path)} not found in data")
+                    if not isinstance(c_val, dict) and not self._match_value(c_val, catalogue.values(key_path)[path]):
+                        matched[path] = False
+                        break
+            return [name for name, path in zip(names, config_paths) if matched[path]]
+
         # labeling for samples level
         samples_key = 'samples'
         samples_dir = samples_key
@@ -89,19 +134,16 @@ class Query(Configurable, Saveable):
         # init list of samples in result
         result[samples_key] = []
 
-        # loop samples
-        for sample in os.listdir(samples_dir):
-            # skip this sample if applicable
-            if sample.startswith('.') or (sample_indices is not None and int(sample) not in sample_indices):
-                continue
-
-            # if applicable, check against sample criteria
-            if sample_criteria is not None and not self._match(
-                sample_criteria,
-                self.load(os.path.join(samples_dir, sample, 'sample.json')),
-            ):
-                continue
+        # skip samples if applicable, and check against sample criteria if applicable
+        samples = [
+            sample
+            for sample in os.listdir(samples_dir)
+            if not sample.startswith('.') and (sample_indices is None or int(sample) in sample_indices)
+        ]
+        samples = matching(samples, lambda sample: os.path.join(samples_dir, sample, 'sample.json'), sample_criteria)
 
+        # loop samples
+        for sample in samples:
             # labeling for models level
             models_key = 'models'
             models_dir = os.path.join(samples_dir, sample, models_key)
@@ -121,19 +163,16 @@ class Query(Configurable, Saveable):
             ):
                 continue
 
-            # loop models
-            for model in os.listdir(models_dir):
-                # if there are filter indices for models, use them
-                if model.startswith('.') or (model_indices is not None and int(model) not in model_indices):
-                    continue
-
-                # if applicable, check against model criteria
-                if model_criteria is not None and not self._match(
-                    model_criteria,
-                    self.load(os.path.join(models_dir, model, 'model.json')),
-                ):
-                    continue
+            # if there are filter indices for models, use them, and check against model criteria if applicable
+            models = [
+                model
+                for model in os.listdir(models_dir)
+                if not model.startswith('.') and (model_indices is None or int(model) in model_indices)
+            ]
+            models = matching(models, lambda model: os.path.join(models_dir, model, 'model.json'), model_criteria)
 
+            # loop models
+            for model in models:
                 # labeling for sims level
                 sims_key = 'sims'
                 sims_dir = os.path.join(models_dir, model, sims_key)
@@ -147,18 +186,16 @@ class Query(Configurable, Saveable):
                 if sim_criteria is None and not include_downstream:
                     continue
 
-                # loop sims
-                for sim in os.listdir(sims_dir):
-                    if sim.startswith('.') or (sim_indices is not None and int(sim) not in sim_indices):
-                        continue
-
-                    # if applicable, check against model criteria
-                    if sim_criteria is not None and not self._match(
-                        sim_criteria,
-                        self.load(os.path.join('config', 'user', 'sims', sim + '.json')),
-                    ):
-                        continue
+                # if there are filter indices for sims, use them, and check against sim criteria if applicable
+                sims = [
+                    sim
+                    for sim in os.listdir(sims_dir)
+                    if not sim.startswith('.') and (sim_indices is None or int(sim) in sim_indices)
+                ]
+                sims = matching(sims, lambda sim: os.path.join('config', 'user', 'sims', sim + '.json'), sim_criteria)
 
+                # loop sims
+                for sim in sims:
                     # post-filtering, add SIM to result
                     result[samples_key][-1][models_key][-1][sims_key].append(int(sim))
 
@@ -172,6 +209,9 @@ class Query(Configurable, Saveable):
             if len(result[samples_key][-1][models_key]) == 0:
                 result[samples_key].pop(-1)
 
+        if catalogue is not None:
+            catalogue.close()
+
         if len(result['samples']) == 0:
             raise IndexError("Query run did not return any sample results. Check your indices and try again.")
 
@@ -203,14 +243,18 @@ class Query(Configurable, Saveable):
         return self.load(self.build_path(mode, indices))
 
     @staticmethod
-    def get_object(mode: Object, indices: list[int]) -> Sample | Simulation:
+    def get_object(mode: Object, indices: list[int], cache: ObjectCache = None) -> Sample | Simulation:
         """Load pickled object for given mode and indices.
 
         :param mode: mode of object (e.g. Object.SAMPLE)
         :param indices: indices of object (e.g. [0, 0, 0]). These are the sample, model, and sim indices, respectively.
             For a sample, pass only [sample_index]. For a model, pass [sample_index, model_index].
+        :param cache: if provided (e.g., Query.object_cache), load the object through this cache, in which case the
+            object is shared with other callers and should not be modified
         :return: object
         """
+        if cache is not None:
+            return cache.load(Query.build_path(mode, indices))
         with open(Query.build_path(mode, indices), 'rb') as obj:
             return pickle.load(obj)
 
@@ -273,63 +317,53 @@ class Query(Configurable, Saveable):
             c_val = criteria[key]
             d_val = data[key]
 
-            # now lots of control flow - dependent on the types of the variables
             # if c_val is a dict, recurse
             if isinstance(c_val, dict):
                 if not self._match(c_val, d_val):
                     return False
 
-            # neither c_val nor d_val are list
-            elif not any(isinstance(v, list) for v in (c_val, d_val)):
-                if c_val != d_val:
-                    return False
+            elif not self._match_value(c_val, d_val):
+                return False
 
-            # c_val IS list, d_val IS NOT list
-            elif isinstance(c_val, list) and not isinstance(d_val, list):
-                if d_val not in c_val:
-                    return False
+        return True
 
-            # c_val IS NOT list, d_val IS list
-            elif not isinstance(c_val, list) and isinstance(d_val, list):
-                # "partial matches" indicates that other values may be present in d_val
-                if not self.search(Config.CRITERIA, 'partial_matches') or c_val not in d_val:
-                    return False
+    def _match_value(self, c_val, d_val) -> bool:
+        # now lots of control flow - dependent on the types of the variables
+        # neither c_val nor d_val are list
+        if not any(isinstance(v, list) for v in (c_val, d_val)):
+            return c_val == d_val
 
-            # both c_val and d_val are list
-            else:  # all([isinstance(v, list) for v in (c_val, d_val)]):
-                # "partial matches" indicates that other values may be present in d_val
-                if not self.search(Config.CRITERIA, 'partial_matches') or not all(c_i in d_val for c_i in c_val):
-                    return False
+        # c_val IS list, d_val IS NOT list
+        elif isinstance(c_val, list) and not isinstance(d_val, list):
+            return d_val in c_val
 
-        return True
+        # c_val IS NOT list, d_val IS list
+        elif not isinstance(c_val, list) and isinstance(d_val, list):
+            # "partial matches" indicates that other values may be present in d_val
+            return bool(self.search(Config.CRITERIA, 'partial_matches')) and c_val in d_val
 
-    def sfap_data(
-        self,
-        fiber_indices: list[int] = None,
-        all_fibers: bool = False,
-        ignore_missing: bool = False,
-        amplitude_indices: tuple[int] = (0,),
-    ):
-        """Obtain SFAP data as a pandas DataFrame for user-defined fiber indices or all fibers.
+        # both c_val and d_val are list
+        else:  # all([isinstance(v, list) for v in (c_val, d_val)]):
+            # "partial matches" indicates that other values may be present in d_val
+            return bool(self.search(Config.CRITERIA, 'partial_matches')) and all(c_i in d_val for c_i in c_val)
 
-        :param fiber_indices: list of fiber indexes to pull SFAP data for. Default: single fiber 0.
-        :param all_fibers: If True, all fiber's SFAP data will be pulled. If False, only fiber_indices will be pulled.
-        :param ignore_missing: if True, missing threshold data will not cause an error.
-        :param amplitude_indices: list of amplitude indices to pull SFAP data for. Default: single amplitude 0.
+    def _iter_nsim_fibers(self, fiber_indices: list[int] = None):
+        """Iterate over the nsims of the query results with their fibers, before reading any of their outputs.
+
+        :param fiber_indices: master indices of the fibers to keep (None for all fibers)
         :raises LookupError: If no results (called before Query.run())
-        :return: pandas DataFrame of SFAP data.
+        :yield: for each nsim with any of the fibers, its values (sample, model, sim, nsim, fiberset_index,
+            waveform_index, active_src_index, active_rec_index), a DataFrame of the inner, fiber (local) and index
+            (master) of its fibers, and its outputs directory
         """
         if self._result is None:
             raise LookupError("No query results, Query.run() must be called before calling analysis methods.")
-        if fiber_indices is None:
-            fiber_indices = [0]
-        [samples, models, sims] = list(self.configs['criteria']['indices'].values())
+        sims = self.search(Config.CRITERIA, 'indices', 'sim')
 
-        # Note: simplify/clean this function. Inspired by threshold_data for first quick approach.
         sample_results: dict
         for sample_results in self._result.get('samples', []):
             sample_index = sample_results['index']
-            sample_object: Sample = self.get_object(Object.SAMPLE, [sample_index])
+            sample_object: Sample = self.get_object(Object.SAMPLE, [sample_index], cache=self.object_cache)
             slide: Slide = sample_object.slides[0]
             n_inners = sum(len(fasc.inners) for fasc in slide.fascicles)
 
@@ -338,20 +372,15 @@ class Query(Configurable, Saveable):
                 model_index = model_results['index']
 
                 for sim_index in sims:
-                    sim_object = self.get_object(Object.SIMULATION, [sample_index, model_index, sim_index])
+                    sim_object = self.get_object(
+                        Object.SIMULATION, [sample_index, model_index, sim_index], cache=self.object_cache
+                    )
+                    sim_dir = self.build_path(
+                        Object.SIMULATION,
+                        [sample_index, model_index, sim_index],
+                        just_directory=True,
+                    )
 
-                    # whether the comparison key is for 'fiber' or 'wave', the nsims will always be in order!
-                    # this realization allows us to simply loop through the factors in sim.factors[key] and treat the
-                    # indices as if they were the nsim indices
-                    #   Better optimized method: loop over master_indices to only obtain data for desired fibers.
-                    #       Need to find another way to obtain nsim_index...
-                    master_indices = []
-                    for i in sim_object.master_product_indices:
-                        if i[0] in fiber_indices:
-                            master_indices.append(i)
-
-                    # init SFAP container for this model, sim, nsim
-                    sfap_data: list[dict] = []
                     for nsim_index, (
                         potentials_product_index,
                         waveform_index,
@@ -361,70 +390,190 @@ class Query(Configurable, Saveable):
                             active_rec_index,
                             fiberset_index,
                         ) = sim_object.potentials_product[potentials_product_index]
-                        # fetch outer->inner->fiber and out->inner maps
-                        out_in_fib, out_in = sim_object.fiberset_map_pairs[fiberset_index]
-
-                        # build base dirs for fetching SFAPs
-                        sim_dir = self.build_path(
-                            Object.SIMULATION,
-                            [sample_index, model_index, sim_index],
-                            just_directory=True,
-                        )
-                        n_sim_dir = os.path.join(sim_dir, 'n_sims', str(nsim_index))
-
-                        # fetch all SFAPs
-                        for inner in range(n_inners):
-                            outer = [index for index, inners in enumerate(out_in) if inner in inners][0]
-
-                            for local_fiber_index, _ in enumerate(out_in_fib[outer][out_in[outer].index(inner)]):
-                                master_index = sim_object.indices_n_to_fib(fiberset_index, inner, local_fiber_index)
-
-                                sfap = []
-                                # Get all amplitudes
-                                for amp in amplitude_indices:
-                                    sfap_path = os.path.join(
-                                        n_sim_dir,
-                                        'data',
-                                        'outputs',
-                                        f'SFAP_time_inner{inner}_fiber{local_fiber_index}_amp{amp}.dat',
-                                    )
-                                    if ignore_missing:
-                                        try:
-                                            sfap_amp = np.loadtxt(sfap_path, skiprows=1)
-                                        except OSError:
-                                            sfap_amp = np.array([[np.nan, np.nan]])
-                                            warnings.warn('Missing SFAP, but continuing.', stacklevel=2)
-                                    else:
-                                        sfap_amp = np.loadtxt(sfap_path, skiprows=1)
-                                    sfap.append(sfap_amp)
-
-                                for i, row in enumerate(sfap[0]):
-                                    base = {
-                                        'sample': sample_results['index'],
-                                        'model': model_results['index'],
-                                        'sim': sim_index,
-                                        'nsim': nsim_index,
-                                        'inner': inner,
-                                        'fiber': local_fiber_index,
-                                        'index': master_index,
-                                        'fiberset_index': fiberset_index,
-                                        'waveform_index': waveform_index,
-                                        'active_src_index': active_src_index,
-                                        'active_rec_index': active_rec_index,
-                                        'SFAP_times': row[0] - 1.2,
-                                    }
-                                    for j, sfap_amp in enumerate(sfap):
-                                        base[f'SFAP{j}'] = sfap_amp[i][1]
-                                    sfap_data.append(base)
-
-        sfap_data = pd.DataFrame(sfap_data)
-        return sfap_data.loc[sfap_data['index'].isin(fiber_indices)] if not all_fibers else sfap_data
+
+                        # inner, local and master index of every fiber of the first n_inners inners
+                        _, inner_offsets, n_to_fib = sim_object.fiberset_indices(fiberset_index)
+                        inner_offsets = inner_offsets[: n_inners + 1]
+                        inners = np.repeat(np.arange(len(inner_offsets) - 1), np.diff(inner_offsets))
+                        fibers = pd.DataFrame(
+                            {
+                                'inner': inners,
+                                'fiber': np.arange(len(inners)) - inner_offsets[inners],
+                                'index': n_to_fib[: len(inners)],
+                            }
+                        ).astype(int)
+                        if fiber_indices is not None:
+                            fibers = fibers.loc[fibers['index'].isin(fiber_indices)].reset_index(drop=True)
+                        if len(fibers) == 0:
+                            continue
+
+                        nsim_values = {
+                            'sample': sample_index,
+                            'model': model_index,
+                            'sim': sim_index,
+                            'nsim': nsim_index,
+                            'fiberset_index': fiberset_index,
+                            'waveform_index': waveform_index,
+                            'active_src_index': active_src_index,
+                            'active_rec_index': active_rec_index,
+                        }
+                        yield nsim_values, fibers, os.path.join(sim_dir, 'n_sims', str(nsim_index), 'data', 'outputs')
+
+    def sfap_data(
+        self,
+        fiber_indices: list[int] = None,
+        all_fibers: bool = False,
+        ignore_missing: bool = False,
+        amplitude_indices: tuple[int] = (0,),
+    ):
+        """Obtain SFAP data as a pandas DataFrame for user-defined fiber indices or all fibers.
+
+        :param fiber_indices: list of fiber indexes to pull SFAP data for. Default: single fiber 0.
+        :param all_fibers: If True, all fiber's SFAP data will be pulled. If False, only fiber_indices will be pulled.
+        :param ignore_missing: if True, missing SFAP data will not cause an error.
+        :param amplitude_indices: list of amplitude indices to pull SFAP data for. Default: single amplitude 0.
+        :return: pandas DataFrame of SFAP data.
+        """
+        frames = []
+        for nsim_values, fibers, times, sfaps in self.iter_sfap_data(
+            fiber_indices=fiber_indices,
+            all_fibers=all_fibers,
+            ignore_missing=ignore_missing,
+            amplitude_indices=amplitude_indices,
+        ):
+            # one row per fiber and time, fiber by fiber
+            n_times, n_fibers = len(times), len(fibers)
+            columns = {}
+            for key in ('sample', 'model', 'sim', 'nsim', 'inner', 'fiber', 'index', *list(nsim_values)[4:]):
+                if key in fibers:
+                    columns[key] = np.repeat(fibers[key].values, n_times)
+                else:
+                    columns[key] = np.repeat(np.array(nsim_values[key], dtype=int), n_times * n_fibers)
+            columns['SFAP_times'] = np.tile(times - 1.2, n_fibers)
+            for j in range(sfaps.shape[2]):
+                columns[f'SFAP{j}'] = sfaps[:, :, j].ravel(order='F')
+            frames.append(pd.DataFrame(columns))
+
+        return pd.concat(frames, ignore_index=True) if len(frames) > 0 else pd.DataFrame([])
+
+    def iter_sfap_data(
+        self,
+        fiber_indices: list[int] = None,
+        all_fibers: bool = False,
+        ignore_missing: bool = False,
+        amplitude_indices: tuple[int] = (0,),
+    ):
+        """Read the SFAPs of user-defined fiber indices or all fibers one nsim at a time.
+
+        Only the SFAP files of the requested fibers are read, so memory is proportional to the SFAPs of one nsim.
+
+        :param fiber_indices: list of fiber indexes to pull SFAP data for. Default: single fiber 0.
+        :param all_fibers: If True, all fiber's SFAP data will be pulled. If False, only fiber_indices will be pulled.
+        :param ignore_missing: if True, missing SFAP files are read as NaN instead of raising an OSError.
+        :param amplitude_indices: list of amplitude indices to pull SFAP data for. Default: single amplitude 0.
+        :raises OSError: If an SFAP file is missing (unless ignore_missing)
+        :raises ValueError: If the SFAPs of an nsim do not share their time points
+        :yield: for each nsim with requested fibers, its values (sample, model, sim, nsim, fiberset_index,
+            waveform_index, active_src_index, active_rec_index), a DataFrame of the inner, fiber (local) and index
+            (master) of its fibers, the SFAP times (not shifted) and the SFAPs (time x fiber x amplitude)
+        """
+        if fiber_indices is None:
+            fiber_indices = [0]
+
+        for nsim_values, fibers, outputs_dir in self._iter_nsim_fibers(None if all_fibers else fiber_indices):
+            times, sfaps = None, []
+            for inner, local_fiber_index in zip(fibers['inner'], fibers['fiber']):
+                for amp in amplitude_indices:
+                    sfap_path = os.path.join(
+                        outputs_dir, f'SFAP_time_inner{inner}_fiber{local_fiber_index}_amp{amp}.dat'
+                    )
+                    try:
+                        sfap_amp = np.loadtxt(sfap_path, skiprows=1, ndmin=2)
+                    except OSError:
+                        if not ignore_missing:
+                            raise
+                        warnings.warn('Missing SFAP, but continuing.', stacklevel=2)
+                        sfaps.append(None)
+                        continue
+                    if times is None:
+                        times = sfap_amp[:, 0]
+                    elif len(sfap_amp) != len(times):
+                        raise ValueError(f'SFAP {sfap_path} does not have the time points of nsim SFAPs')
+                    sfaps.append(sfap_amp[:, 1])
+
+            if times is None:
+                # no SFAP was found, so there are no time points
+                times = np.array([np.nan])
+            nan = np.full(len(times), np.nan)
+            sfaps = np.stack([nan if sfap is None else sfap for sfap in sfaps], axis=1)
+
+            yield nsim_values, fibers, times, sfaps.reshape(len(times), len(fibers), -1)
+
+    @staticmethod
+    def read_thresholds(paths: list[str], ignore_missing=False, workers: int = None) -> np.ndarray:
+        """Read threshold files in bulk with a pool of threads.
+
+        :param paths: paths to the threshold files (thresh_inner<l>_fiber<k>.dat)
+        :param ignore_missing: if True, missing threshold files are read as NaN instead of raising an OSError
+        :param workers: number of threads reading files (defaults to that of concurrent.futures.ThreadPoolExecutor)
+        :return: absolute value of the last threshold in each file
+        """
+
+        def read_chunk(chunk_paths: list[str]) -> list[float]:
+            values = []
+            for path in chunk_paths:
+                try:
+                    with open(path, 'rb') as file:
+                        tokens = file.read().split()
+                except OSError:
+                    if not ignore_missing:
+                        raise
+                    tokens = []
+                # the last threshold is the final one if a file has several (as read before by np.loadtxt)
+                values.append(float(tokens[-1]) if tokens else np.nan)
+            return values
+
+        chunk_size = 256
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            chunks = executor.map(read_chunk, [paths[i : i + chunk_size] for i in range(0, len(paths), chunk_size)])
+            thresholds = np.fromiter(itertools.chain.from_iterable(chunks), dtype=float, count=len(paths))
+
+        if np.isnan(thresholds).any():
+            warnings.warn('Missing threshold, but continuing.', stacklevel=2)
+
+        return np.abs(thresholds)
+
+    @staticmethod
+    def indexed_thresholds(keys: pd.DataFrame, ignore_missing=False) -> np.ndarray:
+        """Update the results index for the sims of the given fibers and read their thresholds from it.
+
+        :param keys: DataFrame with columns sample, model, sim, nsim, inner, and fiber
+        :param ignore_missing: if True, thresholds missing from the index are NaN instead of raising an error
+        :raises LookupError: if thresholds are missing from the index and ignore_missing is False
+        :return: absolute value of the threshold of each fiber
+        """
+        # index the outputs modified since the last update, then look up every fiber at once
+        results_index = ResultsIndex()
+        for sim_key in keys[['sample', 'model', 'sim']].drop_duplicates().itertuples(index=False):
+            results_index.update(*sim_key)
+        thresholds = np.abs(results_index.lookup('threshold', keys))
+        results_index.close()
+
+        n_missing = np.count_nonzero(np.isnan(thresholds))
+        if n_missing > 0 and not ignore_missing:
+            raise LookupError(f"{n_missing} thresholds are missing from the results index")
+        if n_missing > 0:
+            warnings.warn('Missing threshold, but continuing.', stacklevel=2)
+
+        return thresholds
 
     def threshold_data(
         self,
         sim_indices: list[int] = None,
         ignore_missing=False,
         meanify=False,
+        workers: int = None,
+        use_index=False,
     ):
         """Obtain threshold data as a pandas DataFrame.
 
@@ -433,11 +582,11 @@ class Query(Configurable, Saveable):
         :param sim_indices: list of simulation indices to include in the threshold data.
         :param ignore_missing: if True, missing threshold data will not cause an error.
         :param meanify: if True, the threshold data will be returned as a mean of each nsim.
+        :param workers: number of threads reading threshold files (see Query.read_thresholds)
+        :param use_index: if True, read the thresholds from the results index (see Query.indexed_thresholds)
         :raises LookupError: If no results (called before Query.run())
         :return: pandas DataFrame of thresholds.
         """
-        # quick helper class for storing data values
-
         # validation
         if self._result is None:
             raise LookupError("No query results, Query.run() must be called before calling analysis methods.")
@@ -445,13 +594,15 @@ class Query(Configurable, Saveable):
         if sim_indices is None:
             sim_indices = self.search(Config.CRITERIA, 'indices', 'sim')
 
-        alldat = []
+        # one entry per nsim: the values shared by its fibers, and its fibers' inner, local and master indices
+        nsims: list[tuple[dict, np.ndarray, np.ndarray, np.ndarray]] = []
+        paths: list[str] = []
 
         # loop samples
         sample_results: dict
         for sample_results in self._result.get('samples', []):
             sample_index = sample_results['index']
-            sample_object: Sample = self.get_object(Object.SAMPLE, [sample_index])
+            sample_object: Sample = self.get_object(Object.SAMPLE, [sample_index], cache=self.object_cache)
             slide: Slide = sample_object.slides[0]
             n_inners = sum(len(fasc.inners) for fasc in slide.fascicles)
 
@@ -460,7 +611,16 @@ class Query(Configurable, Saveable):
                 model_index = model_results['index']
 
                 for sim_index in sim_indices:
-                    sim_object = self.get_object(Object.SIMULATION, [sample_index, model_index, sim_index])
+                    sim_object = self.get_object(
+                        Object.SIMULATION, [sample_index, model_index, sim_index], cache=self.object_cache
+                    )
+
+                    # build base dir for fetching thresholds
+                    sim_dir = self.build_path(
+                        Object.SIMULATION,
+                        [sample_index, model_index, sim_index],
+                        just_directory=True,
+                    )
 
                     # whether the comparison key is for 'fiber' or 'wave', the nsims will always be in order!
                     # this realization allows us to simply loop through the factors in sim.factors[key] and treat the
@@ -474,99 +634,79 @@ class Query(Configurable, Saveable):
                             *active_rec_index,
                             fiberset_index,
                         ) = sim_object.potentials_product[potentials_product_index]
-                        # fetch outer->inner->fiber and out->inner maps
-                        out_in_fib, out_in = sim_object.fiberset_map_pairs[fiberset_index]
-
-                        # build base dirs for fetching thresholds
-                        sim_dir = self.build_path(
-                            Object.SIMULATION,
-                            [sample_index, model_index, sim_index],
-                            just_directory=True,
-                        )
-                        n_sim_dir = os.path.join(sim_dir, 'n_sims', str(nsim_index))
-
-                        # init thresholds container for this model, sim, nsim
-                        thresholds: list[float] = []
-
-                        # fetch all thresholds
-                        for inner in range(n_inners):
-                            outer = [index for index, inners in enumerate(out_in) if inner in inners][0]
-
-                            for local_fiber_index, _ in enumerate(out_in_fib[outer][out_in[outer].index(inner)]):
-                                master_index = sim_object.indices_n_to_fib(fiberset_index, inner, local_fiber_index)
-
-                                thresh_path = os.path.join(
-                                    n_sim_dir,
-                                    'data',
-                                    'outputs',
-                                    f'thresh_inner{inner}_fiber{local_fiber_index}.dat',
-                                )
-                                if ignore_missing:
-                                    try:
-                                        threshold = np.loadtxt(thresh_path)
-                                    except OSError:
-                                        threshold = np.array(np.nan)
-                                        warnings.warn('Missing threshold, but continuing.', stacklevel=2)
-                                else:
-                                    threshold = np.loadtxt(thresh_path)
-
-                                if threshold.size > 1:
-                                    threshold = threshold[-1]
-                                if meanify is True:
-                                    thresholds.append(abs(threshold))
-                                else:
-                                    alldat.append(
-                                        {
-                                            'sample': sample_results['index'],
-                                            'model': model_results['index'],
-                                            'sim': sim_index,
-                                            'nsim': nsim_index,
-                                            'inner': inner,
-                                            'fiber': local_fiber_index,
-                                            'index': master_index,
-                                            'fiberset_index': fiberset_index,
-                                            'waveform_index': waveform_index,
-                                            'active_src_index': active_src_index,  # Note: only report src or rec
-                                            'active_rec_index': active_rec_index,  # Doesn't make sense to do both
-                                            'threshold': abs(threshold),
-                                        }
-                                    )
-
-                        if meanify is True:
-                            if len(thresholds) == 0:
-                                alldat.append(
-                                    {
-                                        'sample': sample_results['index'],
-                                        'model': model_results['index'],
-                                        'sim': sim_index,
-                                        'nsim': nsim_index,
-                                        'fiberset_index': fiberset_index,
-                                        'waveform_index': waveform_index,
-                                        'active_src_index': active_src_index,
-                                        'active_rec_index': active_rec_index,
-                                        'mean': np.nan,
-                                    }
-                                )
-                            else:
-                                thresholds: np.ndarray = np.array(thresholds)
-
-                                alldat.append(
-                                    {
-                                        'sample': sample_results['index'],
-                                        'model': model_results['index'],
-                                        'sim': sim_index,
-                                        'nsim': nsim_index,
-                                        'fiberset_index': fiberset_index,
-                                        'waveform_index': waveform_index,
-                                        'active_src_index': active_src_index,
-                                        'active_rec_index': active_rec_index,
-                                        'mean': np.mean(thresholds),
-                                        'std': np.std(thresholds, ddof=1),
-                                        'sem': stats.sem(thresholds),
-                                    }
-                                )
-
-        return pd.DataFrame(alldat)
+
+                        # inner, local and master index of every fiber of the first n_inners inners
+                        _, inner_offsets, n_to_fib = sim_object.fiberset_indices(fiberset_index)
+                        inner_offsets = inner_offsets[: n_inners + 1]
+                        inners = np.repeat(np.arange(len(inner_offsets) - 1), np.diff(inner_offsets))
+                        local_fibers = np.arange(len(inners)) - inner_offsets[inners]
+
+                        if not use_index:
+                            outputs_dir = os.path.join(sim_dir, 'n_sims', str(nsim_index), 'data', 'outputs')
+                            paths.extend(
+                                os.path.join(outputs_dir, f'thresh_inner{inner}_fiber{local_fiber_index}.dat')
+                                for inner, local_fiber_index in zip(inners, local_fibers)
+                            )
+
+                        nsim_values = {
+                            'sample': sample_index,
+                            'model': model_index,
+                            'sim': sim_index,
+                            'nsim': nsim_index,
+                            'fiberset_index': fiberset_index,
+                            'waveform_index': waveform_index,
+                            'active_src_index': active_src_index,  # Note: only report src or rec
+                            'active_rec_index': active_rec_index,  # Doesn't make sense to do both
+                        }
+                        nsims.append((nsim_values, inners, local_fibers, n_to_fib[: len(inners)]))
+
+        # assemble the columns, repeating the values shared by the fibers of each nsim
+        n_fibers = np.array([len(inners) for _, inners, _, _ in nsims], dtype=int)
+        nsim_offsets = np.concatenate([[0], np.cumsum(n_fibers)])
+
+        def repeat_nsim_values(key: str):
+            values = [nsim_values[key] for nsim_values, *_ in nsims]
+            if len(values) > 0 and isinstance(values[0], list):
+                # e.g., active_rec_index, kept as one list per fiber
+                return [value for value, count in zip(values, n_fibers) for _ in range(count)]
+            return np.repeat(np.array(values, dtype=int), n_fibers)
+
+        columns = {key: repeat_nsim_values(key) for key in ('sample', 'model', 'sim', 'nsim')}
+        columns['inner'] = np.concatenate([inners for _, inners, _, _ in nsims] or [[]]).astype(int)
+        columns['fiber'] = np.concatenate([local_fibers for _, _, local_fibers, _ in nsims] or [[]]).astype(int)
+        columns['index'] = np.concatenate([master_indices for *_, master_indices in nsims] or [[]]).astype(int)
+        for key in ('fiberset_index', 'waveform_index', 'active_src_index', 'active_rec_index'):
+            columns[key] = repeat_nsim_values(key)
+
+        if use_index:
+            keys = pd.DataFrame({key: columns[key] for key in ('sample', 'model', 'sim', 'nsim', 'inner', 'fiber')})
+            thresholds = self.indexed_thresholds(keys, ignore_missing=ignore_missing)
+        else:
+            thresholds = self.read_thresholds(paths, ignore_missing=ignore_missing, workers=workers)
+
+        if meanify is True:
+            alldat = []
+            for (nsim_values, *_), start, stop in zip(nsims, nsim_offsets[:-1], nsim_offsets[1:]):
+                nsim_thresholds = thresholds[start:stop]
+                if len(nsim_thresholds) == 0:
+                    alldat.append({**nsim_values, 'mean': np.nan})
+                else:
+                    alldat.append(
+                        {
+                            **nsim_values,
+                            'mean': np.mean(nsim_thresholds),
+                            'std': np.std(nsim_thresholds, ddof=1),
+                            'sem': stats.sem(nsim_thresholds),
+                        }
+                    )
+            return pd.DataFrame(alldat)
+
+        if len(thresholds) == 0:
+            return pd.DataFrame([])
+
+        columns['threshold'] = thresholds
+
+        return pd.DataFrame(columns)
 
     def excel_output(  # noqa: C901
         self,
@@ -624,7 +764,9 @@ class Query(Configurable, Saveable):
                     sim_config_path = self.build_path(Config.SIM, indices=[sim_index])
                     sim_config = self.load(sim_config_path)
                     self.add(SetupMode.OLD, Config.SIM, sim_config)
-                    sim_object: Simulation = self.get_object(Object.SIMULATION, [sample_index, model_index, sim_index])
+                    sim_object: Simulation = self.get_object(
+                        Object.SIMULATION, [sample_index, model_index, sim_index], cache=self.object_cache
+                    )
                     sim_dir = self.build_path(
                         Object.SIMULATION,
                         [sample_index, model_index, sim_index],
@@ -737,36 +879,85 @@ class Query(Configurable, Saveable):
 
         writer.save()
 
-    def import_tm_current_matrix(self, nsim):
+    def import_tm_current_matrix(
+        self,
+        nsim,
+        inner: int = 0,
+        fiber: int = 0,
+        amp: int = 0,
+        sample: int = None,
+        model: int = None,
+        sim: int = None,
+    ):
         """Extract current amplitude, number of axons, time vector, and transmembrane current matrix from a binary file.
 
+        The matrix is a read-only view of the file (see Query.read_tm_current_matrix), not a copy.
+
         :param nsim: nsim index to pull data from
+        :param inner: inner index of the fiber
+        :param fiber: local fiber index of the fiber
+        :param amp: amplitude index
+        :param sample: sample index, defaults to the first sample of the query results
+        :param model: model index, defaults to the first model of the query results
+        :param sim: sim index, defaults to the first sim of the query results
+        :return: tstop: duration of the simulation
         :return: time_vector: time points correlating with transmembrane currents
-        :return: current_matrix: transmembrane current matrix
+        :return: current_matrix: transmembrane current matrix (time x compartment)
         """
         sample_results = self._result.get('samples', [])[0]
         model_results = sample_results.get('models', [])[0]
-        sim = model_results.get('sims', [])[0]
-        # Pulls data from first fiber in each nsim.
+        sample = sample_results['index'] if sample is None else sample
+        model = model_results['index'] if model is None else model
+        sim = model_results.get('sims', [])[0] if sim is None else sim
+
+        sim_dir = self.build_path(Object.SIMULATION, [sample, model, sim], just_directory=True)
         imembrane_file_name = os.path.join(
-            os.getcwd(),
-            f"samples/{sample_results['index']}/models/{model_results['index']}/sims/{sim}/n_sims/"
-            f"{nsim}/data/outputs/Imembrane_inner0_fiber0_amp0.dat",
+            sim_dir, 'n_sims', str(nsim), 'data', 'outputs', f'Imembrane_inner{inner}_fiber{fiber}_amp{amp}.dat'
         )
+        return self.read_tm_current_matrix(imembrane_file_name)
 
-        with open(imembrane_file_name, 'rb') as file:
-            alldata = file.read()
+    @staticmethod
+    def read_tm_current_matrix(path: str):
+        """Map a binary transmembrane current file (Imembrane_inner<l>_fiber<k>_amp<a>.dat) into memory.
+
+        The file holds the NEURON Vectors tstop, dt, and the number of compartments, then the currents of each
+        compartment across time, each Vector preceded by its size and type (56 bytes of header in all).
+
+        :param path: path to the Imembrane file
+        :return: tstop: duration of the simulation
+        :return: time_vector: time points correlating with transmembrane currents
+        :return: current_matrix: read-only np.memmap of the transmembrane current matrix (time x compartment)
+        """
+        with open(path, 'rb') as file:
             # Currently it is in native format, might need to be in standard format.
             _, _, tstop, _, _, dt, _, _, axon_num, vector_size, _ = struct.unpack(
-                "@iidiidiidii", alldata[:56]  # 56 is the total number of bytes correlating with the format
+                "@iidiidiidii", file.read(56)  # 56 is the total number of bytes correlating with the format
             )
-            current_matrix = np.array(struct.unpack_from(f"{vector_size}d", alldata[56:]))
-        file.close()
+        axon_num = int(axon_num)
+        n_times = vector_size // axon_num
 
-        # Build current matrix and time vectors from file data
-        current_matrix = current_matrix.reshape(
-            ((int)(vector_size / axon_num), -1), order='F'
-        )  # Matlab and Fortran ('F order') both use column-major layout as the default
-        time_vector = np.arange(0, dt * (vector_size / axon_num), dt)
+        # the currents are written compartment by compartment, so the transpose is the time x compartment matrix
+        current_matrix = np.memmap(path, dtype=np.float64, mode='r', offset=56, shape=(axon_num, n_times)).T
+        time_vector = np.arange(n_times) * dt
 
         return tstop, time_vector, current_matrix
+
+    def iter_tm_current_matrices(self, fiber_indices: list[int] = None, all_fibers: bool = False, amp: int = 0):
+        """Iterate lazily over the transmembrane current matrices of user-defined fiber indices or all fibers.
+
+        Each matrix is mapped into memory only when it is reached (e.g., to reconstruct CNAPs fiber by fiber).
+
+        :param fiber_indices: list of fiber indexes to pull matrices for. Default: single fiber 0.
+        :param all_fibers: If True, the matrices of all fibers will be pulled. If False, only fiber_indices will be.
+        :param amp: amplitude index
+        :yield: for each fiber of each nsim, its values (as in Query.iter_sfap_data, with inner, fiber and index),
+            then tstop, time vector and current matrix (see Query.read_tm_current_matrix)
+        """
+        if fiber_indices is None:
+            fiber_indices = [0]
+
+        for nsim_values, fibers, outputs_dir in self._iter_nsim_fibers(None if all_fibers else fiber_indices):
+            for inner, local_fiber_index, master_index in fibers[['inner', 'fiber', 'index']].itertuples(index=False):
+                path = os.path.join(outputs_dir, f'Imembrane_inner{inner}_fiber{local_fiber_index}_amp{amp}.dat')
+                fiber_values = {**nsim_values, 'inner': inner, 'fiber': local_fiber_index, 'index': master_index}
+                yield (fiber_values, *self.read_tm_current_matrix(path))
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3.7
+
+"""Defines ResultsIndex class.
+
+The copyrights of this software are owned by Duke University.
+Please refer to the LICENSE and README.md files for licensing
+instructions. The source code can be found on the following GitHub
+repository: https://github.com/wmglab-duke/ascent
+"""
+
+import os
+import re
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class ResultsIndex:
+    """Consolidated index of the scalar outputs (thresholds and activations) of completed n_sims.
+
+    The outputs are kept in a SQLite table keyed by (sample, model, sim, nsim, kind, inner, fiber, amp), where kind
+    is 'threshold' or 'activation' and amp is -1 for thresholds. Updating the index for a sim only reads the output
+    files modified since it was last indexed, so repeated analyses do not reparse the outputs.
+
+    IMPORTANT: like Query, paths are relative to the project level
+    """
+
+    # hidden, as the directories of samples/ are listed as samples
+    default_path = os.path.join('samples', '.results_index.db')
+
+    # output files indexed, by kind (thresholds are not per amplitude)
+    kinds = {'thresh': 'threshold', 'activation': 'activation'}
+    pattern = re.compile(r'(thresh|activation)_inner(\d+)_fiber(\d+)(?:_amp(\d+))?\.dat')
+
+    # seconds subtracted from the time an n_sim is indexed, for file systems with coarse modification times
+    mtime_margin = 2.0
+
+    def __init__(self, path: str = None):
+        """Open (and create if needed) the results index.
+
+        :param path: path to the index database, defaults to ResultsIndex.default_path
+        """
+        self.path = path if path is not None else self.default_path
+        self.connection = sqlite3.connect(self.path)
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'sample INTEGER, model INTEGER, sim INTEGER, nsim INTEGER, kind TEXT, inner INTEGER, fiber INTEGER, '
+                'amp INTEGER, value REAL, PRIMARY KEY (sample, model, sim, nsim, kind, inner, fiber, amp))'
+            )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS builds ('
+                'sample INTEGER, model INTEGER, sim INTEGER, nsim INTEGER, indexed_at REAL, '
+                'PRIMARY KEY (sample, model, sim, nsim))'
+            )
+
+    def close(self):
+        """Close the connection to the index database."""
+        self.connection.close()
+
+    @staticmethod
+    def read_value(path: str) -> float:
+        """Read the value of a scalar output file.
+
+        :param path: path to the output file
+        :return: the last value in the file (the final threshold if a file has several), NaN if there is none
+        """
+        with open(path, 'rb') as file:
+            tokens = file.read().split()
+        return float(tokens[-1]) if tokens else np.nan
+
+    def update(self, sample: int, model: int, sim: int) -> int:
+        """Index the outputs of the n_sims of a sim that were modified since they were last indexed.
+
+        Rows of outputs (or n_sims) that no longer exist are removed.
+
+        :param sample: sample index
+        :param model: model index
+        :param sim: sim index
+        :return: number of output files (re)read
+        """
+        sim_key = (sample, model, sim)
+        n_sims_dir = os.path.join('samples', str(sample), 'models', str(model), 'sims', str(sim), 'n_sims')
+        indexed_at = dict(
+            self.connection.execute(
+                'SELECT nsim, indexed_at FROM builds WHERE sample = ? AND model = ? AND sim = ?', sim_key
+            ).fetchall()
+        )
+        nsims = [int(entry) for entry in os.listdir(n_sims_dir) if entry.isdigit()] if os.path.isdir(n_sims_dir) else []
+
+        rows, builds, stale = [], [], []
+        for nsim in nsims:
+            outputs_dir = os.path.join(n_sims_dir, str(nsim), 'data', 'outputs')
+            if not os.path.isdir(outputs_dir):
+                continue
+            started = time.time() - self.mtime_margin
+            since = indexed_at.get(nsim, -np.inf)
+
+            present = set()
+            with os.scandir(outputs_dir) as entries:
+                for entry in entries:
+                    match = self.pattern.fullmatch(entry.name)
+                    if match is None:
+                        continue
+                    prefix, inner, fiber, amp = match.groups('-1')
+                    key = (self.kinds[prefix], int(inner), int(fiber), int(amp))
+                    present.add(key)
+                    if entry.stat().st_mtime > since:
+                        rows.append((*sim_key, nsim, *key, self.read_value(entry.path)))
+
+            if nsim in indexed_at:
+                indexed = self.connection.execute(
+                    'SELECT kind, inner, fiber, amp FROM results '
+                    'WHERE sample = ? AND model = ? AND sim = ? AND nsim = ?',
+                    (*sim_key, nsim),
+                ).fetchall()
+                stale.extend((*sim_key, nsim, *key) for key in set(indexed) - present)
+            builds.append((*sim_key, nsim, started))
+
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self.connection.executemany(
+                'DELETE FROM results WHERE sample = ? AND model = ? AND sim = ? AND nsim = ? '
+                'AND kind = ? AND inner = ? AND fiber = ? AND amp = ?',
+                stale,
+            )
+            for nsim in set(indexed_at) - set(nsims):
+                self.connection.execute(
+                    'DELETE FROM results WHERE sample = ? AND model = ? AND sim = ? AND nsim = ?', (*sim_key, nsim)
+                )
+                self.connection.execute(
+                    'DELETE FROM builds WHERE sample = ? AND model = ? AND sim = ? AND nsim = ?', (*sim_key, nsim)
+                )
+            self.connection.executemany('INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?)', builds)
+
+        return len(rows)
+
+    def values(self, kind: str, sample: int, model: int, sim: int) -> pd.DataFrame:
+        """Get the indexed outputs of a kind for a sim.
+
+        :param kind: kind of output ('threshold' or 'activation')
+        :param sample: sample index
+        :param model: model index
+        :param sim: sim index
+        :return: DataFrame with columns nsim, inner, fiber, amp, and value
+        """
+        return pd.read_sql_query(
+            'SELECT nsim, inner, fiber, amp, value FROM results '
+            'WHERE kind = ? AND sample = ? AND model = ? AND sim = ?',
+            self.connection,
+            params=(kind, sample, model, sim),
+        )
+
+    def lookup(self, kind: str, keys: pd.DataFrame) -> np.ndarray:
+        """Get the indexed outputs of a kind for many keys at once.
+
+        :param kind: kind of output ('threshold' or 'activation')
+        :param keys: DataFrame with columns sample, model, sim, nsim, inner, fiber (and amp, for activations)
+        :return: value for each row of keys, NaN where there is no indexed output
+        """
+        keys = keys.assign(amp=keys['amp'] if 'amp' in keys else -1)
+        columns = ['sample', 'model', 'sim', 'nsim', 'inner', 'fiber', 'amp']
+        indexed = [
+            self.values(kind, sample, model, sim).assign(sample=sample, model=model, sim=sim)
+            for sample, model, sim in keys[['sample', 'model', 'sim']].drop_duplicates().itertuples(index=False)
+        ]
+        if len(indexed) == 0:
+            return np.full(len(keys), np.nan)
+        values = pd.concat(indexed).set_index(columns)['value']
+        return values.reindex(pd.MultiIndex.from_frame(keys[columns].astype(int))).to_numpy(dtype=float)
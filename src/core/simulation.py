@@ -11,6 +11,7 @@ repository: https://github.com/wmglab-duke/ascent
 import copy
 import itertools
 import json
+import multiprocessing
 import os
 import pickle
 import re
@@ -20,11 +21,23 @@ import warnings
 
 import numpy as np
 import scipy.interpolate as sci
+from tqdm import tqdm
 
 from src.core import Sample
-from src.utils import Config, Configurable, Env, ExportMode, IncompatibleParametersError, Saveable, SetupMode, WriteMode
-
-from .fiberset import FiberSet
+from src.utils import (
+    Config,
+    Configurable,
+    Env,
+    ExportMode,
+    FiberSetFormat,
+    IncompatibleParametersError,
+    InputsFormat,
+    Saveable,
+    SetupMode,
+    WriteMode,
+)
+
+from .fiberset import FiberSet, FiberSetCoords
 from .hocwriter import HocWriter
 from .waveform import Waveform
 
@@ -36,15 +49,10 @@ def get_z_coords(root, file):
     :param file: fiber file to get z-coords from
     :return: z-coords
     """
-    with open(os.path.join(root, file)) as coords_file:
-        coords_file_lines = coords_file.readlines()[1:]
-        coords = []
-        for coords_file_line in coords_file_lines:
-            coords = np.append(
-                coords,
-                float(coords_file_line.split(' ')[2]),  # this is the z coord
-            )
-    return coords
+    if FiberSetCoords.exists(root):
+        return FiberSetCoords(root).z(int(file.split('.')[0]))
+    # fibersets written before the columnar coordinates, the z coord is the third column of the fiber file
+    return np.loadtxt(os.path.join(root, file), skiprows=1, usecols=2, ndmin=1)
 
 
 class Simulation(Configurable, Saveable):
@@ -70,6 +78,7 @@ class Simulation(Configurable, Saveable):
         self.fiberset_key = []
         self.fiberset_map_pairs: list[tuple[list, list]] = []
         self.ss_fiberset_map_pairs: list[tuple[list, list]] = []
+        self.fiberset_index_maps: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
         self.stim_product = []
         self.rec_product = []
         self.stim_key = []
@@ -153,6 +162,8 @@ class Simulation(Configurable, Saveable):
 
         self.fiberset_product = list(itertools.product(*fiberset_factors.values()))
 
+        columnar = self.fiberset_format() == FiberSetFormat.COLUMNAR
+
         for i, fiberset_set in enumerate(self.fiberset_product):
             fiberset_directory = os.path.join(fibersets_directory, str(i))
             os.makedirs(fibersets_directory, exist_ok=True)
@@ -167,10 +178,11 @@ class Simulation(Configurable, Saveable):
             ).generate(
                 sim_directory, super_sample=False
             ).write(
-                WriteMode.DATA, fiberset_directory
+                WriteMode.DATA, fiberset_directory, columnar=columnar
             )
 
             self.fiberset_map_pairs.append((fiberset.out_to_fib, fiberset.out_to_in))
+            self.fiberset_index_maps.append(self.index_maps(fiberset.out_to_fib, fiberset.out_to_in))
             self.fibersets.append(fiberset)
 
         if self.search(Config.SIM, 'supersampled_bases', 'generate', optional=True):
@@ -185,7 +197,7 @@ class Simulation(Configurable, Saveable):
             ).generate(
                 sim_directory, super_sample=True
             ).write(
-                WriteMode.DATA, ss_fibercoords_directory
+                WriteMode.DATA, ss_fibercoords_directory, columnar=columnar
             )
 
             self.ss_fiberset_map_pairs.append((fiberset.out_to_fib, fiberset.out_to_in))
@@ -198,8 +210,9 @@ class Simulation(Configurable, Saveable):
 
         :param down_coords: down-sampled coords
         :param super_coords: super-sampled coords
-        :param data_vector: data vector to interpolate
-        :return: interpolated data vector at down-sampled coords
+        :param data_vector: data vector to interpolate, or an array of data vectors (e.g., n_bases x super-sampled
+            coords), which are all interpolated in a single call
+        :return: interpolated data vector(s) at down-sampled coords
         """
         f = sci.interp1d(super_coords, data_vector)
         return f(down_coords)
@@ -506,13 +519,78 @@ class Simulation(Configurable, Saveable):
 
         return self
 
-    def build_n_sims(self, sim_dir, sim_num) -> 'Simulation':
+    def build_n_sims(self, sim_dir, sim_num, workers: int = 1) -> 'Simulation':
         """Set up the neuron simulation for the given simulation.
 
+        The n_sims are independent once the bases exist, so with more than one worker they are built in a process
+        pool. Each task builds some of the n_sims of a single fiberset, so that the bases of that fiberset are loaded
+        once per task. Every n_sim is written by exactly one task, so the output does not depend on the number of
+        workers.
+
         :param sim_dir: directory of the simulation we are building n_sims for
         :param sim_num: index of the simulation we are building n_sims for
+        :param workers: number of processes used to build the n_sims
         :return: self
         """
+        # group n_sims by fiberset so that the bases of only one fiberset are held in memory at a time
+        nsims_by_fiberset: dict[int, list[tuple[int, int, int]]] = {}
+        for t, (potentials_ind, waveform_ind) in enumerate(self.master_product_indices):
+            fiberset_ind = self.potentials_product[potentials_ind][-1]
+            nsims_by_fiberset.setdefault(fiberset_ind, []).append((t, potentials_ind, waveform_ind))
+
+        # supersampled bases are validated once, and loaded once per file for all n_sims of a task
+        supersampled_bases: dict = self.search(Config.SIM, 'supersampled_bases', optional=True)
+        ss_bases = None
+        if supersampled_bases is not None and supersampled_bases.get('use') is True:
+            ss_bases = SupersampledBases(self, supersampled_bases, sim_dir)
+
+        if workers <= 1:
+            for fiberset_ind, nsims in nsims_by_fiberset.items():
+                self.build_fiberset_n_sims(sim_dir, sim_num, fiberset_ind, nsims, ss_bases)
+            return self
+
+        # split the n_sims of each fiberset so that there are at least as many tasks as workers
+        n_chunks = -(-workers // len(nsims_by_fiberset))
+        tasks = [
+            (fiberset_ind, nsims[chunk_ind::n_chunks])
+            for fiberset_ind, nsims in nsims_by_fiberset.items()
+            for chunk_ind in range(min(n_chunks, len(nsims)))
+        ]
+
+        progress = tqdm(total=len(self.master_product_indices), desc=f'\tBuilding n_sims for Sim {sim_num}')
+        with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+            results = [
+                pool.apply_async(
+                    self.build_fiberset_n_sims,
+                    (sim_dir, sim_num, fiberset_ind, nsims, ss_bases),
+                    callback=progress.update,
+                )
+                for fiberset_ind, nsims in tasks
+            ]
+            # raise any errors from the workers
+            for result in results:
+                result.get()
+        progress.close()
+
+        return self
+
+    def build_fiberset_n_sims(
+        self,
+        sim_dir,
+        sim_num,
+        fiberset_ind: int,
+        nsims: list[tuple[int, int, int]],
+        ss_bases: 'SupersampledBases' = None,
+    ) -> int:
+        """Set up the neuron simulations of a single fiberset.
+
+        :param sim_dir: directory of the simulation we are building n_sims for
+        :param sim_num: index of the simulation we are building n_sims for
+        :param fiberset_ind: index of the fiberset of the n_sims
+        :param nsims: list of (master product index, potentials index, waveform index) of the n_sims to build
+        :param ss_bases: supersampled bases to interpolate potentials from, None to use the fibersets bases
+        :return: number of n_sims built
+        """
 
         def make_inner_fiber_diam_key(my_fiberset_ind, my_nsim_inputs_directory, my_potentials_directory, my_file):
             """Make the key for the inner-fiber-diameter key file.
@@ -536,78 +614,317 @@ class Simulation(Configurable, Saveable):
                 pickle.dump(inner_fiber_diam_key, f)
                 f.close()
 
-        supersampled_bases: dict = self.search(Config.SIM, 'supersampled_bases', optional=True)
-        do_supersample: bool = supersampled_bases is not None and supersampled_bases.get('use') is True
+        def write_fiber_potentials(my_nsim_inputs_directory, my_fname_prefix, my_fiberset_ind, my_fibers_ve):
+            """Write the potentials of the fibers of a fiberset to the inputs of a neuron simulation.
+
+            :param my_nsim_inputs_directory: directory of the neuron simulation inputs
+            :param my_fname_prefix: prefix of the file name (src or rec)
+            :param my_fiberset_ind: index of the fiberset
+            :param my_fibers_ve: iterable of (index of the fiber within the fiberset, potentials along the fiber)
+            """
+            fibers_ve = [
+                (*self.indices_fib_to_n(my_fiberset_ind, my_fiber_ind), my_ve) for my_fiber_ind, my_ve in my_fibers_ve
+            ]
+            if inputs_format == InputsFormat.BINARY:
+                self.write_binary_potentials(my_nsim_inputs_directory, my_fname_prefix, fibers_ve)
+                return
+
+            for inner_index, fiber_index, my_ve in fibers_ve:
+                fiber_filename_dat = f'inner{inner_index}_fiber{fiber_index}.dat'
+                if os.path.exists(
+                    os.path.join(my_nsim_inputs_directory, fiber_filename_dat)
+                ):  # If sims from ASCENT<=1.2.2 already exist, rename to new file name formatting
+                    final_filename_dat = fiber_filename_dat
+                else:
+                    final_filename_dat = f'{my_fname_prefix}_{fiber_filename_dat}'
+                np.savetxt(
+                    os.path.join(my_nsim_inputs_directory, final_filename_dat),
+                    my_ve,
+                    fmt='%0.18f',
+                    header=str(len(my_ve)),
+                    comments='',
+                )
+
+        inputs_format = self.inputs_format()
+
+        # weights of every active_srcs and active_recs combination, in order of the bases
+        combination_weights, valid_combinations = self.combination_weights(sim_dir)
+        n_src_combinations = len(self.stim_product)
+
+        fiberset_directory = os.path.join(sim_dir, str(sim_num), 'fibersets', str(fiberset_ind))
+        fiber_files = self.fiber_files(fiberset_directory)
+
+        if ss_bases is None:
+            # getting potentials from fibersets_bases, loaded once for all n_sims of this fiberset
+            # fibersets_bases\<fiberset_index>\<basis_index>\<fibers>
+            fiber_offsets, fiberset_bases = self.load_fiberset_bases(sim_dir, sim_num, fiberset_ind, fiber_files)
+        else:
+            # getting potentials from supersampled bases, interpolated once for all n_sims of this fiberset
+            # ss_bases\<basis_index>\<fibers>
+            fiber_offsets, fiberset_bases = ss_bases.fiberset_bases(fiberset_directory, fiber_files)
+        # potentials of all fibers for every combination, (n_combinations x total number of coordinates)
+        combination_potentials = self.weight_bases(combination_weights, fiberset_bases)
+        inner_fiber_xy = self.fiberset_xy(fiberset_ind, fiberset_directory, fiber_files)
+
         # loops through n_sims
-        for t, (potentials_ind, waveform_ind) in enumerate(self.master_product_indices):
-            active_src_vals, active_rec_vals, fiberset_ind, nsim_inputs_directory = self.n_sim_setup(
-                potentials_ind, sim_dir, sim_num, t, waveform_ind
+        for t, potentials_ind, waveform_ind in nsims:
+            _, _, _, nsim_inputs_directory = self.n_sim_setup(potentials_ind, sim_dir, sim_num, t, waveform_ind)
+            active_src_ind, active_rec_ind, _ = self.potentials_product[potentials_ind]
+
+            for fname_prefix, combination_ind in zip(
+                ['src', 'rec'], [active_src_ind, n_src_combinations + active_rec_ind]
+            ):
+                # Execute procedure only if weights contains valid values and is not empty
+                if not valid_combinations[combination_ind]:
+                    continue
+
+                neuron_potentials_input = combination_potentials[combination_ind]
+                fibers_ve = [
+                    (int(file.split('.')[0]), neuron_potentials_input[start:stop])
+                    for file, start, stop in zip(fiber_files, fiber_offsets[:-1], fiber_offsets[1:])
+                ]
+                write_fiber_potentials(nsim_inputs_directory, fname_prefix, fiberset_ind, fibers_ve)
+
+            # fiber locations, for the threshold bounds of fibers near fibers that already ran (see submit.py)
+            np.savetxt(
+                os.path.join(nsim_inputs_directory, 'inner_fiber_xy.dat'),
+                inner_fiber_xy,
+                fmt=['%d', '%d', '%0.6f', '%0.6f'],
+                header='inner fiber x y',
             )
-            src_bases_indices, rec_bases_indices = self.srcs_mapping(sim_dir)
 
-            fiberset_directory = os.path.join(sim_dir, str(sim_num), 'fibersets', str(fiberset_ind))
+            if os.path.exists(os.path.join(fiberset_directory, 'diams.txt')):
+                make_inner_fiber_diam_key(
+                    fiberset_ind,
+                    nsim_inputs_directory,
+                    fiberset_directory,
+                    'diams.txt',
+                )
 
-            for fname_prefix, weights, bases_indices in zip(
-                ['src', 'rec'], [active_src_vals, active_rec_vals], [src_bases_indices, rec_bases_indices]
-            ):
-                if (
-                    not any(np.isnan(weights)) and weights
-                ):  # Execute procedure if weights contains valid values and is not empty
-                    # get the weights in order of the bases,
-                    # since the weights are for a single cuff, but the bases span cuffs
-                    all_weights = list(np.zeros(self.n_bases))
-                    for i, basis_index in enumerate(bases_indices):
-                        all_weights[basis_index] = weights[i]
-
-                    for root, _, files in os.walk(fiberset_directory):
-                        for file in files:
-                            if re.match('[0-9]+\\.dat', file):
-                                master_fiber_index = int(file.split('.')[0])
-                                inner_index, fiber_index = self.indices_fib_to_n(fiberset_ind, master_fiber_index)
-                                fiber_filename_dat = f'inner{inner_index}_fiber{fiber_index}.dat'
-
-                                if not do_supersample:
-                                    # getting potentials from fibersets_bases
-                                    # fibersets_bases\<fiberset_index>\<basis_index>\<fibers>
-                                    _, bases = self.get_bases(file, sim_dir, sim_num, fiberset_ind)
-                                    neuron_potentials_input = self.weight_bases(all_weights, bases)
-
-                                else:
-                                    # getting potentials from supersampled bases
-                                    # ss_bases\<basis_index>\<fibers>
-                                    self.validate_ss_dz(supersampled_bases, sim_dir)
-                                    source_sim = supersampled_bases.get('source_sim')
-                                    ss_coords_root, ss_bases = self.get_bases(file, sim_dir, source_sim)
-                                    weighted_ss_bases = self.weight_bases(all_weights, ss_bases)
-                                    fiber_coords = get_z_coords(root, file)
-                                    ss_coords = get_z_coords(ss_coords_root, file)
-                                    neuron_potentials_input = self.interpolate_2d(
-                                        fiber_coords, ss_coords, weighted_ss_bases
-                                    )
-
-                                if os.path.exists(
-                                    os.path.join(nsim_inputs_directory, fiber_filename_dat)
-                                ):  # If sims from ASCENT<=1.2.2 already exist, rename to new file name formatting
-                                    final_filename_dat = fiber_filename_dat
-                                else:
-                                    final_filename_dat = f'{fname_prefix}_{fiber_filename_dat}'
-                                np.savetxt(
-                                    os.path.join(nsim_inputs_directory, final_filename_dat),
-                                    neuron_potentials_input,
-                                    fmt='%0.18f',
-                                    header=str(len(neuron_potentials_input)),
-                                    comments='',
-                                )
-                            elif file == 'diams.txt':
-                                make_inner_fiber_diam_key(
-                                    fiberset_ind,
-                                    nsim_inputs_directory,
-                                    fiberset_directory,
-                                    file,
-                                )
+        return len(nsims)
+
+    def combination_weights(self, sim_dir) -> tuple[np.ndarray, np.ndarray]:
+        """Stack the weights of every active_srcs and active_recs combination into a single matrix.
+
+        The contact weights in Sim are for a single cuff, but the bases span all cuffs, so the weights of each
+        combination are placed in order of the bases (bases of other cuffs have zero weight). Rows are ordered as
+        stim_product followed by rec_product, so the potentials for every combination are a single matrix product
+        with the bases (see Simulation.weight_bases).
+
+        :param sim_dir: directory of the simulation
+        :return: weights (n_combinations x n_bases), True for each combination with valid (non-empty, non-NaN) weights
+        """
+        src_bases_indices, rec_bases_indices = self.srcs_mapping(sim_dir)
+
+        combinations = [(weights, src_bases_indices) for weights in self.stim_product] + [
+            (weights, rec_bases_indices) for weights in self.rec_product
+        ]
+
+        weights_matrix = np.zeros((len(combinations), self.n_bases))
+        valid = np.zeros(len(combinations), dtype=bool)
+        for row, (weights, bases_indices) in enumerate(combinations):
+            if not weights or any(np.isnan(weights)):
+                continue
+            weights_matrix[row, bases_indices] = weights
+            valid[row] = True
+
+        return weights_matrix, valid
+
+    def fiberset_xy(self, fiberset_ind: int, fiberset_directory: str, fiber_files: list[str]) -> np.ndarray:
+        """Get the xy location of each fiber of a fiberset, with its inner and local fiber indices.
+
+        :param fiberset_ind: index of the fiberset
+        :param fiberset_directory: directory of the fiberset
+        :param fiber_files: fiber files of the fiberset (see Simulation.fiber_files)
+        :return: one row per fiber: inner, fiber, x, y (of the first coordinate of the fiber)
+        """
+        fiberset_coords = FiberSetCoords(fiberset_directory)
+        inner_fiber_xy = np.zeros((len(fiber_files), 4))
+        for row, file in enumerate(fiber_files):
+            fiber_ind = int(file.split('.')[0])
+            inner_fiber_xy[row, :2] = self.indices_fib_to_n(fiberset_ind, fiber_ind)
+            inner_fiber_xy[row, 2:] = fiberset_coords.fiber(fiber_ind)[0, :2]
+        return inner_fiber_xy
+
+    @staticmethod
+    def fiber_files(fiberset_directory: str) -> list[str]:
+        """Get the fiber coordinate files of a fiberset, sorted by fiber index.
+
+        For columnar fibersets, the fiber files may not exist, but the bases of each fiber are still named after them.
+
+        :param fiberset_directory: directory of the fiberset
+        :return: list of fiber file names (e.g., ['0.dat', '1.dat', ...])
+        """
+        if FiberSetCoords.exists(fiberset_directory):
+            return [f'{fiber_ind}.dat' for fiber_ind in range(len(FiberSetCoords(fiberset_directory)))]
+        return sorted(
+            (file for file in os.listdir(fiberset_directory) if re.match('[0-9]+\\.dat$', file)),
+            key=lambda file: int(file.split('.')[0]),
+        )
+
+    def load_fiberset_bases(self, sim_dir: str, source_sim: int, fiberset_ind: int, fiber_files: list[str]):
+        """Load the bases potentials of all fibers in a fiberset into a single array.
+
+        The potentials of each fiber are concatenated along the second axis, so weighting the bases for every fiber
+        in the fiberset is a single matrix product. Fibers may have different numbers of coordinates, so the offsets
+        of each fiber in the concatenated array are also returned.
+
+        :param sim_dir: directory of the simulations
+        :param source_sim: index of the simulation from which the bases are taken
+        :param fiberset_ind: index of the fiberset
+        :param fiber_files: fiber files to load bases for (see Simulation.fiber_files)
+        :return: offsets (length n_fibers + 1), bases (n_bases x total number of coordinates)
+        """
+        fibers_bases = [self.get_bases(file, sim_dir, source_sim, fiberset_ind)[1] for file in fiber_files]
+        return self.concatenate_bases(fibers_bases)
+
+    def concatenate_bases(self, fibers_bases: list) -> tuple[np.ndarray, np.ndarray]:
+        """Concatenate the bases potentials of many fibers along the coordinates.
+
+        :param fibers_bases: bases of each fiber (n_bases x number of coordinates of the fiber)
+        :return: offsets (length n_fibers + 1), bases (n_bases x total number of coordinates)
+        """
+        offsets = np.concatenate(([0], np.cumsum([len(fiber_bases[0]) for fiber_bases in fibers_bases]))).astype(int)
+        bases = np.empty((self.n_bases, offsets[-1]))
+        for fiber_bases, start, stop in zip(fibers_bases, offsets[:-1], offsets[1:]):
+            bases[:, start:stop] = fiber_bases
+        return offsets, bases
 
+    def fiberset_format(self) -> FiberSetFormat:
+        """Get the format in which the coordinates of the fibersets are written.
+
+        :raises ValueError: if the fiberset format in Sim is not a valid FiberSetFormat
+        :return: FiberSetFormat (TEXT if not specified in Sim)
+        """
+        fiberset_format = self.search(Config.SIM, 'fiberset_format', optional=True)
+        if fiberset_format is None:
+            return FiberSetFormat.TEXT
+        if fiberset_format not in FiberSetFormat.__members__:
+            raise ValueError(
+                f'Invalid fiberset_format in Sim: {fiberset_format}, must be one of {list(FiberSetFormat.__members__)}'
+            )
+        return FiberSetFormat[fiberset_format]
+
+    def write_fiber_files(self, sim_directory: str) -> 'Simulation':
+        """Write a file per fiber for fibersets written in the COLUMNAR format, which COMSOL reads coordinates from.
+
+        Fiber files that already exist are not rewritten, so this does nothing for fibersets written as TEXT.
+
+        :param sim_directory: directory of the simulation
+        :return: self
+        """
+        directories = [os.path.join(sim_directory, 'fibersets', str(i)) for i in range(len(self.fiberset_product))]
+        if os.path.isdir(os.path.join(sim_directory, 'ss_coords')):
+            directories.append(os.path.join(sim_directory, 'ss_coords'))
+        for directory in directories:
+            if FiberSetCoords.exists(directory):
+                FiberSetCoords(directory).write_fiber_files(directory)
         return self
 
+    def inputs_format(self) -> InputsFormat:
+        """Get the format in which the potentials inputs of the neuron simulations are written.
+
+        :raises ValueError: if the inputs format in Sim is not a valid InputsFormat
+        :return: InputsFormat (TEXT if not specified in Sim)
+        """
+        inputs_format = self.search(Config.SIM, 'inputs_format', optional=True)
+        if inputs_format is None:
+            return InputsFormat.TEXT
+        if inputs_format not in InputsFormat.__members__:
+            raise ValueError(
+                f'Invalid inputs_format in Sim: {inputs_format}, must be one of {list(InputsFormat.__members__)}'
+            )
+        return InputsFormat[inputs_format]
+
+    @staticmethod
+    def binary_potentials_paths(inputs_directory: str, fname_prefix: str) -> tuple[str, str]:
+        """Get the paths of the binary potentials of a neuron simulation and of their index.
+
+        :param inputs_directory: directory of the neuron simulation inputs
+        :param fname_prefix: prefix of the file names (src or rec)
+        :return: path of the potentials, path of the index
+        """
+        return (
+            os.path.join(inputs_directory, f'{fname_prefix}_potentials.bin'),
+            os.path.join(inputs_directory, f'{fname_prefix}_potentials_index.dat'),
+        )
+
+    @staticmethod
+    def write_binary_potentials(inputs_directory: str, fname_prefix: str, fibers_ve: list) -> None:
+        """Write the potentials of all fibers of a neuron simulation to a single binary file.
+
+        The potentials of each fiber are concatenated as little-endian doubles, which can be memory mapped in Python
+        (see Simulation.load_fiber_potentials) and read in NEURON with Vector.fread (see VeSpace_binary_read). The
+        index has the number of fibers on the first line, then one line per fiber: inner, fiber, offset, length
+        (offset and length in number of values).
+
+        :param inputs_directory: directory of the neuron simulation inputs
+        :param fname_prefix: prefix of the file names (src or rec)
+        :param fibers_ve: list of (inner index, fiber index, potentials along the fiber)
+        """
+        potentials_path, index_path = Simulation.binary_potentials_paths(inputs_directory, fname_prefix)
+        index = np.zeros((len(fibers_ve), 4), dtype=int)
+        offset = 0
+        with open(potentials_path, 'wb') as f:
+            for row, (inner, fiber, ve) in enumerate(fibers_ve):
+                ve = np.asarray(ve, dtype='<f8')
+                ve.tofile(f)
+                index[row] = inner, fiber, offset, len(ve)
+                offset += len(ve)
+        np.savetxt(index_path, index, fmt='%d', header=str(len(index)), comments='')
+
+    @staticmethod
+    def read_binary_potentials_index(inputs_directory: str, fname_prefix: str = 'src') -> dict:
+        """Read the index of the binary potentials of a neuron simulation.
+
+        :param inputs_directory: directory of the neuron simulation inputs
+        :param fname_prefix: prefix of the file names (src or rec)
+        :return: dict of (inner, fiber) -> (offset, length), None if the potentials were not written as binary
+        """
+        index_path = Simulation.binary_potentials_paths(inputs_directory, fname_prefix)[1]
+        if not os.path.exists(index_path):
+            return None
+        index = np.loadtxt(index_path, dtype=int, skiprows=1, ndmin=2)
+        return {(inner, fiber): (offset, length) for inner, fiber, offset, length in index.tolist()}
+
+    @staticmethod
+    def input_fibers(inputs_directory: str, fname_prefix: str = 'src') -> list[tuple[int, int]]:
+        """Get the (inner, fiber) indices of all fibers with potentials inputs in a neuron simulation.
+
+        :param inputs_directory: directory of the neuron simulation inputs
+        :param fname_prefix: prefix of the file names (src or rec)
+        :return: list of (inner, fiber)
+        """
+        index = Simulation.read_binary_potentials_index(inputs_directory, fname_prefix)
+        if index is not None:
+            return list(index.keys())
+        fibers = []
+        for file in os.listdir(inputs_directory):
+            match = re.match(f'{fname_prefix}_inner([0-9]+)_fiber([0-9]+)\\.dat$', file)
+            if match:
+                fibers.append((int(match.group(1)), int(match.group(2))))
+        return fibers
+
+    @staticmethod
+    def load_fiber_potentials(inputs_directory: str, inner: int, fiber: int, fname_prefix: str = 'src') -> np.ndarray:
+        """Load the potentials inputs of a single fiber of a neuron simulation, in either format.
+
+        :param inputs_directory: directory of the neuron simulation inputs
+        :param inner: inner index of the fiber
+        :param fiber: fiber index of the fiber within the inner
+        :param fname_prefix: prefix of the file names (src or rec)
+        :raises KeyError: if the fiber is not in the binary potentials index
+        :return: potentials along the fiber (read-only memory map if written as binary)
+        """
+        index = Simulation.read_binary_potentials_index(inputs_directory, fname_prefix)
+        if index is None:
+            return np.loadtxt(os.path.join(inputs_directory, f'{fname_prefix}_inner{inner}_fiber{fiber}.dat'))[1:]
+        if (inner, fiber) not in index:
+            raise KeyError(f'inner {inner} fiber {fiber} not found in binary potentials index of {inputs_directory}')
+        offset, length = index[(inner, fiber)]
+        potentials_path = Simulation.binary_potentials_paths(inputs_directory, fname_prefix)[0]
+        return np.memmap(potentials_path, dtype='<f8', mode='r', offset=offset * 8, shape=(length,))
+
     def srcs_mapping(self, sim_dir):
         """Get the bases indices of the sources contacts for the simulation from COMSOL's Identifier Manager.
 
@@ -672,34 +989,72 @@ class Simulation(Configurable, Saveable):
     def weight_bases(self, weights, bases):
         """Weight the bases.
 
-        :param weights: weights to weight the bases with (defined in Sim Config active_srcs, active_recs)
-        :param bases: vector of bases to weight for each active source/rec
-        :return: weighted bases
+        If weights is a matrix of combinations (see Simulation.combination_weights), the weighted bases of every
+        combination are computed in a single contraction.
+
+        :param weights: weights to weight the bases with (defined in Sim Config active_srcs, active_recs),
+            either a vector (n_bases) or a matrix (n_combinations x n_bases)
+        :param bases: vector of bases to weight for each active source/rec, or an array (n_bases x ...)
+        :return: weighted bases (... or n_combinations x ...)
+        """
+        return np.tensordot(np.asarray(weights, dtype=float), np.asarray(bases, dtype=float), axes=(-1, 0))
+
+    @staticmethod
+    def index_maps(out_to_fib: list, out_to_in: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Build dense lookup arrays between fiber indices and inner/local fiber indices from a fiberset map pair.
+
+        :param out_to_fib: fiber indices within each inner of each outer (FiberSet.out_to_fib)
+        :param out_to_in: inner indices of each outer (FiberSet.out_to_in)
+        :return: fib_to_n (n_fibers x 2 array of inner and local fiber index, -1 for fibers not within an inner),
+            inner_offsets (n_inners + 1 array, inner l has fibers n_to_fib[inner_offsets[l]:inner_offsets[l + 1]]),
+            n_to_fib (fiber indices ordered by inner and local fiber index)
         """
-        weighted_potentials = np.zeros(len(bases[0]))
-        for src_ind, src_weight in enumerate(weights):
-            weighted_potentials += bases[src_ind] * src_weight
+        inner_fibers = {
+            inner: fibers
+            for outer_fibers, inners in zip(out_to_fib, out_to_in)
+            for inner, fibers in zip(inners, outer_fibers)
+        }
+        n_inners = max(inner_fibers, default=-1) + 1
+        fibers_per_inner = [inner_fibers.get(inner, []) for inner in range(n_inners)]
 
-        return weighted_potentials
+        inner_offsets = np.zeros(n_inners + 1, dtype=int)
+        inner_offsets[1:] = np.cumsum([len(fibers) for fibers in fibers_per_inner])
+        n_to_fib = np.array([fiber for fibers in fibers_per_inner for fiber in fibers], dtype=int)
+
+        fib_to_n = np.full((n_to_fib.max(initial=-1) + 1, 2), -1, dtype=int)
+        inners = np.repeat(np.arange(n_inners), np.diff(inner_offsets))
+        local_fibers = np.arange(n_to_fib.size) - inner_offsets[inners]
+        # reversed so that a fiber listed in more than one inner maps to the first, as the search it replaced did
+        fib_to_n[n_to_fib[::-1]] = np.column_stack([inners, local_fibers])[::-1]
+
+        return fib_to_n, inner_offsets, n_to_fib
+
+    def fiberset_indices(self, fiberset_ind) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the dense lookup arrays between fiber indices and inner/local fiber indices of a fiberset.
+
+        The arrays are built with the fibersets and saved with the Simulation object; they are rebuilt from
+        fiberset_map_pairs for Simulation objects saved without them.
+
+        :param fiberset_ind: fiberset index
+        :return: fib_to_n, inner_offsets, n_to_fib (see Simulation.index_maps)
+        """
+        if len(getattr(self, 'fiberset_index_maps', [])) != len(self.fiberset_map_pairs):
+            self.fiberset_index_maps = [self.index_maps(*map_pair) for map_pair in self.fiberset_map_pairs]
+        return self.fiberset_index_maps[fiberset_ind]
 
     def indices_fib_to_n(self, fiberset_ind, fiber_ind) -> tuple[int, int]:
         """Get inner and fiber indices from fiber index and fiberset_index.
 
         :param fiberset_ind: fiberset index
         :param fiber_ind: fiber index within fiberset
+        :raises ValueError: if the fiber is not within an inner
         :return: (l, k) as in "inner<l>_fiber<k>.dat" for NEURON sim
         """
-
-        def search(arr, target) -> tuple[int, int, int]:
-            for a, outer in enumerate(arr):
-                for b, inner in enumerate(outer):
-                    for c, fib in enumerate(inner):
-                        if fib == target:  # noqa: R503
-                            return a, b, c
-
-        out_fib, out_in = self.fiberset_map_pairs[fiberset_ind]
-        i, j, k = search(out_fib, fiber_ind)
-        return out_in[i][j], k
+        fib_to_n, _, _ = self.fiberset_indices(fiberset_ind)
+        inner, fiber = fib_to_n[fiber_ind] if fiber_ind < len(fib_to_n) else (-1, -1)
+        if inner < 0:
+            raise ValueError(f'Fiber {fiber_ind} of fiberset {fiberset_ind} is not within an inner')
+        return int(inner), int(fiber)
 
     def indices_n_to_fib(self, fiberset_index, inner_index, local_fiber_index) -> tuple[int, int]:
         """Get fiber index from inner and local fiber indices.
@@ -707,18 +1062,13 @@ class Simulation(Configurable, Saveable):
         :param fiberset_index: fiberset index
         :param inner_index: inner index
         :param local_fiber_index: local fiber index
+        :raises IndexError: if the inner does not have a fiber with the local fiber index
         :return: fiber index within fiberset
         """
-
-        def search(arr, target) -> tuple[int, int]:
-            for a, outer in enumerate(arr):
-                for b, inner in enumerate(outer):
-                    if inner == target:  # noqa: R503
-                        return a, b
-
-        out_fib, out_in = self.fiberset_map_pairs[fiberset_index]
-        i, j = search(out_in, inner_index)
-        return out_fib[i][j][local_fiber_index]
+        _, inner_offsets, n_to_fib = self.fiberset_indices(fiberset_index)
+        if not 0 <= local_fiber_index < inner_offsets[inner_index + 1] - inner_offsets[inner_index]:
+            raise IndexError(f'Inner {inner_index} of fiberset {fiberset_index} has no fiber {local_fiber_index}')
+        return int(n_to_fib[inner_offsets[inner_index] + local_fiber_index])
 
     @staticmethod
     def _build_file_structure(sim_obj_dir, t):
@@ -911,9 +1261,10 @@ class Simulation(Configurable, Saveable):
                 nsim_dir = os.path.join(source, dirname)
                 outdir = os.path.join(nsim_dir, 'data', 'outputs')
                 indir = os.path.join(nsim_dir, 'data', 'inputs')
-                for file in [f for f in os.listdir(indir) if f.startswith('src_inner') and f.endswith('.dat')]:
-                    if not os.path.exists(os.path.join(outdir, 'thresh_' + file.replace('src_', ''))):
-                        print(f"Missing threshold {os.path.join(outdir, 'thresh_' + file)}")
+                for inner, fiber in Simulation.input_fibers(indir):
+                    target = os.path.join(outdir, f'thresh_inner{inner}_fiber{fiber}.dat')
+                    if not os.path.exists(target):
+                        print(f"Missing threshold {target}")
                         allthresh = False
         return allthresh
 
@@ -935,11 +1286,9 @@ class Simulation(Configurable, Saveable):
                 nsim_dir = os.path.join(source, dirname)
                 outdir = os.path.join(nsim_dir, 'data', 'outputs')
                 indir = os.path.join(nsim_dir, 'data', 'inputs')
-                for file in [f for f in os.listdir(indir) if f.startswith('src_inner') and f.endswith('.dat')]:
+                for inner, fiber in Simulation.input_fibers(indir):
                     for amp in range(n_amps):
-                        target = os.path.join(
-                            outdir, 'activation_' + file.replace('src_', '').replace('.dat', f'_amp{amp}.dat')
-                        )
+                        target = os.path.join(outdir, f'activation_inner{inner}_fiber{fiber}_amp{amp}.dat')
                         if not os.path.exists(target):
                             print(f'Missing finite amp {target}')
                             allamp = False
@@ -963,3 +1312,58 @@ class Simulation(Configurable, Saveable):
         :return: boolean!
         """
         return all(os.path.exists(os.path.join(sim_dir, 'ss_bases', str(basis))) for basis, _ in self.ss_product)
+
+
+class SupersampledBases:
+    """Supersampled bases of a source Sim, shared by all n_sims that interpolate potentials from them.
+
+    The dz of the source Sim is validated once, the coordinates of the supersampled fibers are memory mapped (see
+    FiberSetCoords), and the bases of each supersampled fiber are loaded once and kept in memory.
+    """
+
+    def __init__(self, simulation: Simulation, supersampled_bases: dict, sim_dir: str):
+        """Validate the supersampled bases of the source Sim.
+
+        :param simulation: Simulation that uses the supersampled bases
+        :param supersampled_bases: information about the supersampled bases from Sim
+        :param sim_dir: directory of the simulations
+        """
+        simulation.validate_ss_dz(supersampled_bases, sim_dir)
+        self.simulation = simulation
+        self.sim_dir = sim_dir
+        self.source_sim = supersampled_bases.get('source_sim')
+        self.ss_coords: FiberSetCoords = None
+        self.bases: dict[str, np.ndarray] = {}
+
+    def load(self, file: str) -> tuple[np.ndarray, np.ndarray]:
+        """Get the supersampled z-coordinates and bases of a fiber, loading them the first time.
+
+        :param file: fiber file (e.g., '0.dat')
+        :return: z-coords, bases (n_bases x number of supersampled coordinates)
+        """
+        if file not in self.bases:
+            ss_coords_root, ss_bases = self.simulation.get_bases(file, self.sim_dir, self.source_sim)
+            self.bases[file] = np.asarray(ss_bases, dtype=float)
+            # loaded on first use, so that the coordinates are not copied to the processes building n_sims
+            if self.ss_coords is None:
+                self.ss_coords = FiberSetCoords(ss_coords_root)
+        return self.ss_coords.z(int(file.split('.')[0])), self.bases[file]
+
+    def fiberset_bases(self, fiberset_directory: str, fiber_files: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Interpolate the supersampled bases onto the coordinates of the fibers in a fiberset.
+
+        Interpolation is linear in the bases, so the bases are interpolated once (all bases of a fiber in a single
+        call) and weighted afterward for every combination of contact weights. The result has the same layout as
+        Simulation.load_fiberset_bases.
+
+        :param fiberset_directory: directory of the fiberset
+        :param fiber_files: fiber files to interpolate bases for (see Simulation.fiber_files)
+        :return: offsets (length n_fibers + 1), bases (n_bases x total number of coordinates)
+        """
+        fiberset_coords = FiberSetCoords(fiberset_directory)
+        fibers_bases = []
+        for file in fiber_files:
+            ss_coords, ss_bases = self.load(file)
+            fiber_coords = fiberset_coords.z(int(file.split('.')[0]))
+            fibers_bases.append(self.simulation.interpolate_2d(fiber_coords, ss_coords, ss_bases))
+        return self.simulation.concatenate_bases(fibers_bases)
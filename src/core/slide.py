@@ -13,7 +13,7 @@ import os
 import matplotlib.pyplot as plt
 import numpy as np
 from quantiphy import Quantity
-from shapely.geometry import Point
+from shapely import vectorized
 
 from src.utils import MethodError, MorphologyError, NerveMode, ReshapeNerveMode, WriteMode
 
@@ -534,6 +534,7 @@ class Slide:
         out_to_fib = []
         out_to_in = []
         xy_points = np.asarray(points)[:, :2]
+        x, y = xy_points[:, 0], xy_points[:, 1]
 
         inner_ind = 0  # noqa SIM113
         for i, fascicle in enumerate(self.fascicles):
@@ -543,12 +544,14 @@ class Slide:
                 inners = fascicle.inners
             else:
                 inners = [fascicle.outer]
-            for j, inner in enumerate(inners):
+            for inner in inners:
                 out_to_in[i].append(inner_ind)
-                out_to_fib[i].append([])
                 inner_ind += 1
-                for q, fiber in enumerate(xy_points):
-                    if Point(fiber).within(inner.polygon()):
-                        out_to_fib[i][j].append(q)
+                # only test the points within the bounds of the inner, all at once (prepared geometry)
+                polygon = inner.polygon()
+                min_x, min_y, max_x, max_y = polygon.bounds
+                candidates = np.flatnonzero((x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y))
+                within = vectorized.contains(polygon, x[candidates], y[candidates])
+                out_to_fib[i].append(candidates[within].tolist())
 
         return out_to_fib, out_to_in
@@ -17,6 +17,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pyclipper
 import pymunk
+from shapely import vectorized
 from shapely.affinity import affine_transform, rotate, scale
 from shapely.geometry import Point, Polygon
 from shapely.ops import nearest_points
@@ -395,20 +396,36 @@ class Trace:
         trace_to_compare = self.deepcopy()
         trace_to_compare.offset(None, -buffer)
 
-        min_x, min_y, max_x, max_y = trace_to_compare.polygon().bounds
+        polygon = trace_to_compare.polygon()
+        min_x, min_y, max_x, max_y = polygon.bounds
+        lower, extent = np.array([min_x, min_y]), np.array([max_x - min_x, max_y - min_y])
 
-        points: list[tuple[float]] = []
+        # draw from the Mersenne Twister state of random.seed so the points match drawing them one at a time
         random.seed(my_xy_seed)
+        _, (*key, pos), _ = random.getstate()
+        generator = np.random.RandomState()
+        generator.set_state(('MT19937', np.array(key, dtype=np.uint32), pos))
 
+        # draw blocks of candidates sized by the fraction of the bounds within the trace, keep those within the trace
+        acceptance = max(polygon.area / max(np.prod(extent), np.finfo(float).tiny), 0.01)
+        points = np.empty((0, 2))
         while len(points) < count:
-            coordinate = tuple(
-                (random.random() * (ceiling - floor)) + floor for floor, ceiling in ((min_x, max_x), (min_y, max_y))
-            )
-
-            if Point(coordinate).within(trace_to_compare.polygon()):
-                points.append(coordinate)
-
-        return points
+            state = generator.get_state()
+            block_size = int(np.ceil((count - len(points)) / acceptance * 1.1)) + 16
+            candidates = generator.random_sample((block_size, 2)) * extent + lower
+            within = np.flatnonzero(vectorized.contains(polygon, candidates[:, 0], candidates[:, 1]))
+            if len(points) + len(within) >= count:
+                # leave the random state after the last point kept, as if each candidate was drawn on its own
+                used = within[count - len(points) - 1] + 1
+                generator.set_state(state)
+                generator.random_sample((used, 2))
+                within = within[: count - len(points)]
+            points = np.concatenate([points, candidates[within]])
+
+        _, key, pos, *_ = generator.get_state()
+        random.setstate((3, (*key.tolist(), pos), None))
+
+        return [tuple(point) for point in points.tolist()]
 
     def within(self, outer: 'Trace') -> bool:
         """Check if the trace is within another trace.
@@ -445,9 +445,9 @@ public class ModelWrapper {
 
                     // LOOP OVER FIBERS IN FIBERSET
                     for (String fiber_file : fiberset_file_list) {
-                        if (
-                            !fiber_file.contains("diams.txt") && !fiber_file.contains("offsets.txt")
-                        ) {
+                        // only fiber coordinate files (<fiber_index>.dat), skips diams.txt, offsets.txt, and
+                        // the columnar coordinates (coords.npy, coords_offsets.npy)
+                        if (fiber_file.matches("[0-9]+\\.dat")) {
                             // build path to fibeR
                             String[] fiber_file_parts = fiber_file.split("\\.");
                             Integer fiber_file_ind = Integer.parseInt(fiber_file_parts[0]);
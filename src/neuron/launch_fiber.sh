@@ -0,0 +1,44 @@
+#!/bin/bash
+
+# The copyrights of this software are owned by Duke University.
+# Please refer to the LICENSE and README.md files for licensing instructions.
+# The source code can be found on the following GitHub repository: https://github.com/wmglab-duke/ascent
+
+# Run the NEURON simulation of one fiber of an n_sim, with its parameters from the n_sim manifest (fiber_tasks.csv,
+# written by submit.py --manifest). Run from the export directory.
+# If the fiber is the first of a batch (submit.py --batch-runtime), the other fibers of the batch are run after it.
+# usage: bash launch_fiber.sh <n_sim path> [<job number>, defaults to the slurm array task ID]
+
+sim_path=$1
+job_number=${2:-$SLURM_ARRAY_TASK_ID}
+
+row=$(awk -F, -v job="$job_number" 'NR > 1 && $1 == job {print; exit}' "${sim_path}/fiber_tasks.csv")
+if [ -z "$row" ]; then
+	echo "No fiber task ${job_number} in ${sim_path}/fiber_tasks.csv" >&2
+	exit 1
+fi
+IFS=, read -r _ inner fiber stimamp_top stimamp_bottom fiberD deltaz axonnodes <<< "$row"
+
+cd "$sim_path" || exit 1
+batch_args=()
+batch_fname="start_scripts/batch_${job_number}.dat"
+if [ -f "$batch_fname" ]; then
+	batch_args=(-c "strdef fiber_batch_fname" -c "fiber_batch_fname=\"${batch_fname}\"")
+fi
+chmod a+rwx special
+./special -nobanner \
+	-c "strdef sim_path" \
+	-c "sim_path=\"${sim_path}\"" \
+	-c "inner_ind=${inner}" \
+	-c "fiber_ind=${fiber}" \
+	-c "stimamp_top=${stimamp_top}" \
+	-c "stimamp_bottom=${stimamp_bottom}" \
+	-c "fiberD=${fiberD}" \
+	-c "deltaz=${deltaz}" \
+	-c "axonnodes=${axonnodes}" \
+	-c "saveflag_end_ap_times=0" \
+	-c "saveflag_runtime=0" \
+	-c "flag_binary_inputs=0" \
+	-c "early_stop_flag=0" \
+	"${batch_args[@]}" \
+	-c "load_file(\"launch.hoc\")" blank.hoc
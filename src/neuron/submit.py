@@ -9,8 +9,11 @@ repository: https://github.com/wmglab-duke/ascent
 """
 
 import argparse
+import functools
+import glob
 import json
 import multiprocessing
+import multiprocessing.pool
 import os
 import pickle
 import re
@@ -19,6 +22,7 @@ import subprocess
 import sys
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from json import JSONDecodeError
 
 import numpy as np
@@ -135,10 +139,38 @@ submit_context_group.add_argument(
     help='Set submission context to cluster, overrides run.json',
 )
 
+parser.add_argument(
+    '-M',
+    '--manifest',
+    action='store_true',
+    help='On UNIX-like systems, write the parameters of the fibers of each n_sim to one table (fiber_tasks.csv), '
+    'run by launch_fiber.sh, instead of writing a start script per fiber',
+)
+
+parser.add_argument(
+    '-B',
+    '--batch-runtime',
+    type=float,
+    help='Run the fibers of each n_sim in batches of about this estimated runtime (in seconds), one NEURON process '
+    'per batch, instead of one NEURON process per fiber',
+)
+
+parser.add_argument(
+    '-E',
+    '--estimate-report',
+    action='store_true',
+    help='Instead of submitting, write the thresholds of all fibers of each n_sim estimated from their potentials '
+    '(estimated_thresholds.csv) and print their estimated recruitment',
+)
+
 parser.add_argument('-v', '--verbose', action='store_true', help='Print detailed submission info')
 
 OS = 'UNIX-LIKE' if any(s in sys.platform for s in ['darwin', 'linux']) else 'WINDOWS'
 
+# rough runtime (in seconds) per unit of fiber cost (compartments x time steps x NEURON runs), measured for MRG fibers;
+# only used for n_sims with no saved runtimes to calibrate with (see get_runtime_scale)
+DEFAULT_RUNTIME_SCALE = 4e-6
+
 
 # %% Set up utility functions
 
@@ -195,6 +227,18 @@ def load(config_path: str):
         return json.load(handle)
 
 
+@functools.lru_cache(maxsize=None)
+def load_cached(config_path: str):
+    """Load in json data once per submission, assuming it has already been validated.
+
+    The same data is returned to every caller, so it must not be modified.
+
+    :param config_path: the string path to load up
+    :return: json data (usually dict or list)
+    """
+    return load(config_path)
+
+
 def ensure_dir(directory):
     """Ensure that a directory exists. If it does not, create it.
 
@@ -232,23 +276,122 @@ def auto_compile(override: bool = False):
     return False
 
 
-def get_diameter(my_inner_fiber_diam_key, my_inner_ind, my_fiber_ind):
-    """Get the diameter of the fiber from the inner fiber diameter key.
+def get_diameters(my_inner_fiber_diam_key):
+    """Get the diameters of the fibers from the inner fiber diameter key.
 
     :param my_inner_fiber_diam_key: the key for the fiber diameters
-    :param my_inner_ind: the index of the inner
-    :param my_fiber_ind: the index of the fiber within the inner
-    :return: the diameter for this fiber
+    :return: a dict of (inner, fiber) -> the diameter for this fiber
     """
-    for item in my_inner_fiber_diam_key:
-        if item[0] == my_inner_ind and item[1] == my_fiber_ind:
-            my_diameter = item[2]
-            break
+    diameters = {}
+    for my_inner_ind, my_fiber_ind, my_diameter in my_inner_fiber_diam_key:
+        if isinstance(my_diameter, list) and len(my_diameter) == 1:
+            my_diameter = my_diameter[0]
+        # the first diameter listed for a fiber is used
+        diameters.setdefault((my_inner_ind, my_fiber_ind), my_diameter)
 
-    if isinstance(my_diameter, list) and len(my_diameter) == 1:
-        my_diameter = my_diameter[0]
+    return diameters
 
-    return my_diameter
+
+def read_nsim_diameters(fibers_path, sim_config):
+    """Read the diameters of the fibers of an n_sim.
+
+    :param fibers_path: the path to the n_sim inputs
+    :param sim_config: the n_sim configuration
+    :return: a dict of (inner, fiber) -> the diameter for this fiber (see get_diameters), None if the n_sim has no
+        inner fiber diameter key; the diameter of all fibers from the n_sim configuration, None if it has one
+    """
+    inner_fiber_diam_key_file = os.path.join(fibers_path, 'inner_fiber_diam_key.obj')
+    if os.path.exists(inner_fiber_diam_key_file):
+        with open(inner_fiber_diam_key_file, 'rb') as f:
+            return get_diameters(pickle.load(f)), None
+    return None, sim_config['fibers']['z_parameters']['diameter']
+
+
+def read_potentials_index(fibers_path, cuff_prefix='src'):
+    """Read the index of the binary potentials of an n_sim, if the potentials were written as binary.
+
+    :param fibers_path: the path to the n_sim inputs
+    :param cuff_prefix: the prefix of the potentials (src or rec)
+    :return: a dict of (inner, fiber) -> (offset, length), None if the potentials were written as text
+    """
+    index_path = os.path.join(fibers_path, f'{cuff_prefix}_potentials_index.dat')
+    if not os.path.exists(index_path):
+        return None
+    index = np.loadtxt(index_path, dtype=int, skiprows=1, ndmin=2)
+    return {(inner, fiber): (offset, length) for inner, fiber, offset, length in index.tolist()}
+
+
+def get_n_fiber_coords(fibers_path, potentials_index, cuff_type, inner_ind, fiber_ind):
+    """Get the number of coordinates (compartments) of a fiber from its potentials.
+
+    :param fibers_path: the path to the n_sim inputs
+    :param potentials_index: the binary potentials index of the n_sim (see read_potentials_index), None if text
+    :param cuff_type: the prefix of the potentials file as a list (e.g., ['src']), empty for backwards compatibility
+    :param inner_ind: the index of the inner this fiber is in
+    :param fiber_ind: the index of the fiber within the inner
+    :return: the number of coordinates of the fiber
+    """
+    # get the number of coordinates from the binary potentials index or data/inputs/inner{}_fiber{}.dat top line
+    if potentials_index is not None:
+        return potentials_index[(inner_ind, fiber_ind)][1]
+
+    if cuff_type:
+        fiber_ve_path = os.path.join(fibers_path, f'{cuff_type[0]}_inner{inner_ind}_fiber{fiber_ind}.dat')
+    else:  # Backwards compatibility
+        fiber_ve_path = os.path.join(fibers_path, f'inner{inner_ind}_fiber{fiber_ind}.dat')
+
+    # the number of coordinates is the first line, the potentials follow
+    with open(fiber_ve_path) as handle:
+        return int(float(handle.readline()))
+
+
+def get_n_tsteps(fibers_path):
+    """Get the number of time steps of an n_sim from its waveform (dt and stop on the first two lines).
+
+    :param fibers_path: the path to the n_sim inputs
+    :return: the number of time steps
+    """
+    with open(os.path.join(fibers_path, 'waveform.dat')) as handle:
+        dt, stop = float(handle.readline()), float(handle.readline())
+    return max(1, round(stop / dt))
+
+
+def get_protocol_runs(sim_config, top, bottom):
+    """Estimate the number of NEURON runs needed to simulate a fiber with the protocol of its n_sim.
+
+    :param sim_config: the n_sim configuration
+    :param top: the upper threshold bound of the fiber
+    :param bottom: the lower threshold bound of the fiber
+    :return: the number of amplitudes, or the number of steps of the bisection search between the bounds
+    """
+    protocol = sim_config['protocol']
+    if protocol['mode'] == 'FINITE_AMPLITUDES':
+        return len(protocol['amplitudes'])
+
+    # runs at both bounds, then one run per halving of the bounds down to the resolution of the search
+    termination = protocol.get('termination_criteria', {})
+    if termination.get('mode') == 'ABSOLUTE_DIFFERENCE':
+        resolution = termination['tolerance']
+    else:
+        resolution = termination.get('percent', 1) / 100 * abs(top)
+    if resolution <= 0 or top == bottom:
+        return 2
+    return 2 + max(0, int(np.ceil(np.log2(abs(top - bottom) / resolution))))
+
+
+def read_runtimes(output_path):
+    """Read the runtimes of the fibers of an n_sim that were simulated with saving runtimes.
+
+    :param output_path: the path to the n_sim outputs
+    :return: a dict of (inner, fiber) -> runtime (in seconds, summed over amplitudes)
+    """
+    runtimes = {}
+    for file in os.listdir(output_path):
+        match = re.fullmatch('runtime_inner([0-9]+)_fiber([0-9]+)_amp[0-9]+\\.dat', file)
+        if match:
+            key = (int(match.group(1)), int(match.group(2)))
+            runtimes[key] = runtimes.get(key, 0) + float(np.loadtxt(os.path.join(output_path, file)))
+    return runtimes
 
 
 def get_deltaz(fiber_model, diameter):
@@ -258,7 +401,7 @@ def get_deltaz(fiber_model, diameter):
     :param diameter: the diameter of the fiber in microns
     :return: the deltaz for this fiber, the neuron flag for the fiber model
     """
-    fiber_z_config = load(os.path.join('config', 'system', 'fiber_z.json'))
+    fiber_z_config = load_cached(os.path.join('config', 'system', 'fiber_z.json'))
     fiber_model_info: dict = fiber_z_config['fiber_type_parameters'][fiber_model]
 
     if fiber_model_info.get("geom_determination_method") == 0:
@@ -292,8 +435,9 @@ def get_deltaz(fiber_model, diameter):
     return delta_z, neuron_flag
 
 
+@functools.lru_cache(maxsize=None)
 def get_thresh_bounds(sim_dir: str, sim_name: str, inner_ind: int):
-    """Get threshold bounds (upper and lower) for this simulation.
+    """Get threshold bounds (upper and lower) for this simulation, once per inner of each n_sim.
 
     :param sim_dir: the string path to the simulation directory
     :param sim_name: the string name of the n_sim
@@ -305,7 +449,7 @@ def get_thresh_bounds(sim_dir: str, sim_name: str, inner_ind: int):
     sample = sim_name.split('_')[0]
     n_sim = sim_name.split('_')[3]
 
-    sim_config = load(os.path.join(sim_dir, sim_name, f'{n_sim}.json'))
+    sim_config = load_cached(os.path.join(sim_dir, sim_name, f'{n_sim}.json'))
 
     if sim_config['protocol']['mode'] == 'ACTIVATION_THRESHOLD' or sim_config['protocol']['mode'] == 'BLOCK_THRESHOLD':
         if 'scout' in sim_config['protocol']['bounds_search']:
@@ -371,6 +515,380 @@ def get_thresh_bounds(sim_dir: str, sim_name: str, inner_ind: int):
     return top, bottom
 
 
+def read_fiber_xy(fibers_path):
+    """Read the xy location of each fiber of an n_sim (written with its inputs, see Simulation.fiberset_xy).
+
+    :param fibers_path: the path to the n_sim inputs
+    :return: a dict of (inner, fiber) -> (x, y), None if the n_sim was built without the locations of its fibers
+    """
+    xy_path = os.path.join(fibers_path, 'inner_fiber_xy.dat')
+    if not os.path.exists(xy_path):
+        return None
+    return {(int(inner), int(fiber)): (x, y) for inner, fiber, x, y in np.loadtxt(xy_path, ndmin=2)}
+
+
+def read_thresholds(output_path):
+    """Read the thresholds of the fibers of an n_sim that already ran.
+
+    :param output_path: the path to the n_sim outputs
+    :return: a dict of (inner, fiber) -> threshold (the last, if the file has more than one)
+    """
+    thresholds = {}
+    for file in os.listdir(output_path) if os.path.exists(output_path) else []:
+        match = re.fullmatch('thresh_inner([0-9]+)_fiber([0-9]+)\\.dat', file)
+        if match:
+            stimamp = np.atleast_1d(np.loadtxt(os.path.join(output_path, file)))
+            if len(stimamp) > 0:
+                thresholds[(int(match.group(1)), int(match.group(2)))] = float(stimamp[-1])
+    return thresholds
+
+
+def get_neighbor_data(sim_name, sim_config):
+    """Get the thresholds of the fibers that already ran near the fibers of an n_sim, by inner.
+
+    Used for the threshold bounds of each fiber from the thresholds of the fibers nearest to it (see
+    get_neighbor_bounds), if "neighbors" is defined in the bounds search of the n_sim. The fibers that already ran are
+    those of the same n_sim, or of the n_sim with the same index of a reference Sim ("model" and "sim" of "neighbors").
+
+    :param sim_name: the string name of the n_sim
+    :param sim_config: the n_sim configuration
+    :return: a dict with the number of neighbors (count), the relative margin of the bounds (margin), the n_sim of the
+        fibers that already ran (reference), the xy of the fibers of the n_sim (xy), and for each inner the xy and
+        thresholds of its fibers that already ran (inners); None if "neighbors" is not defined or the n_sims were built
+        without the locations of their fibers
+    """
+    protocol = sim_config['protocol']
+    if protocol['mode'] not in ['ACTIVATION_THRESHOLD', 'BLOCK_THRESHOLD']:
+        return None
+    neighbors = protocol['bounds_search'].get('neighbors')
+    if neighbors is None:
+        return None
+
+    sample, model, sim, n_sim = sim_name.split('_')
+    reference = f"{sample}_{neighbors.get('model', model)}_{neighbors.get('sim', sim)}_{n_sim}"
+    xy = read_fiber_xy(os.path.join('n_sims', sim_name, 'data', 'inputs'))
+    reference_xy = read_fiber_xy(os.path.join('n_sims', reference, 'data', 'inputs'))
+    if xy is None or reference_xy is None:
+        WarnOnlyOnce.warn(
+            'WARNING: "neighbors" is defined in Sim, but the n_sims were built without the locations of their fibers '
+            '(inner_fiber_xy.dat), so using standard top and bottom. Rebuild the n_sims to use "neighbors".'
+        )
+        return None
+
+    inners = {}
+    for (inner_ind, fiber_ind), threshold in read_thresholds(
+        os.path.join('n_sims', reference, 'data', 'outputs')
+    ).items():
+        if (inner_ind, fiber_ind) in reference_xy:
+            inners.setdefault(inner_ind, []).append((*reference_xy[(inner_ind, fiber_ind)], threshold))
+    return {
+        'count': neighbors.get('count', 3),
+        'margin': neighbors.get('margin', 10) / 100,
+        'reference': reference,
+        'xy': xy,
+        'inners': {inner_ind: np.array(rows) for inner_ind, rows in inners.items()},
+    }
+
+
+def get_neighbor_bounds(neighbor_data, inner_ind, fiber_ind):
+    """Get the threshold bounds of a fiber from the thresholds of the fibers of its inner nearest to it.
+
+    The threshold of the fiber is estimated as the mean of the thresholds of the "count" nearest fibers that already
+    ran (see get_neighbor_data), weighted by inverse distance. The bounds are "margin" higher and lower than it.
+
+    :param neighbor_data: the thresholds of the fibers that already ran, by inner (see get_neighbor_data), or None
+    :param inner_ind: the index of the inner this fiber is in
+    :param fiber_ind: the index of the fiber
+    :return: the upper and lower threshold bounds, None if no fiber of its inner already ran
+    """
+    if (
+        neighbor_data is None
+        or inner_ind not in neighbor_data['inners']
+        or (inner_ind, fiber_ind) not in neighbor_data['xy']
+    ):
+        return None, None
+    done = neighbor_data['inners'][inner_ind]
+    distances = np.hypot(*(done[:, :2] - neighbor_data['xy'][(inner_ind, fiber_ind)]).T)
+    nearest = np.argsort(distances, kind='stable')[: neighbor_data['count']]
+    if distances[nearest[0]] == 0:
+        stimamp = done[nearest[0], 2]
+    else:
+        stimamp = np.average(done[nearest, 2], weights=1 / distances[nearest])
+    return (1 + neighbor_data['margin']) * stimamp, (1 - neighbor_data['margin']) * stimamp
+
+
+def read_fiber_potentials(fibers_path, potentials_index):
+    """Read the potentials of all fibers of an n_sim, in either format.
+
+    :param fibers_path: the path to the n_sim inputs
+    :param potentials_index: the binary potentials index of the n_sim (see read_potentials_index), None if text
+    :return: a dict of (inner, fiber) -> the potentials along the fiber
+    """
+    if potentials_index is not None:
+        potentials = np.fromfile(os.path.join(fibers_path, 'src_potentials.bin'), dtype='<f8')
+        return {key: potentials[offset : offset + length] for key, (offset, length) in potentials_index.items()}
+
+    fibers_ve = {}
+    for file in os.listdir(fibers_path):
+        # First regex group with ? is optional - for backwards compatibility
+        match = re.fullmatch('(?:src_)?inner([0-9]+)_fiber([0-9]+)\\.dat', file)
+        if match:
+            fibers_ve[(int(match.group(1)), int(match.group(2)))] = np.loadtxt(os.path.join(fibers_path, file))[1:]
+    return fibers_ve
+
+
+@functools.lru_cache(maxsize=None)
+def get_activating_function_peaks(sim_name: str):
+    """Get the peaks of the activating function of each fiber of an n_sim, from its potentials.
+
+    The activating function is the second difference of the potentials (per unit stimamp) at the nodes of Ranvier of
+    myelinated fibers, or along unmyelinated fibers. Fibers with the same number of nodes are differenced at once.
+
+    :param sim_name: the string name of the n_sim
+    :return: a dict of (inner, fiber) -> (diameter, maximum of the activating function, maximum of its negative)
+    """
+    fibers_path = os.path.join('n_sims', sim_name, 'data', 'inputs')
+    n_sim = sim_name.split('_')[-1]
+    sim_config = load_cached(os.path.join('n_sims', sim_name, f'{n_sim}.json'))
+    fiber_z_config = load_cached(os.path.join('config', 'system', 'fiber_z.json'))
+    # myelinated fibers repeat node, MYSA, FLUT, 6 x STIN, FLUT, MYSA
+    step = 11 if fiber_z_config['fiber_type_parameters'][sim_config['fibers']['mode']]['neuron_flag'] == 2 else 1
+    diameters, diameter = read_nsim_diameters(fibers_path, sim_config)
+
+    nodes_ve = {
+        key: ve[::step] for key, ve in read_fiber_potentials(fibers_path, read_potentials_index(fibers_path)).items()
+    }
+    lengths = {}
+    for key, ve in nodes_ve.items():
+        lengths.setdefault(len(ve), []).append(key)
+
+    peaks = {}
+    for length, keys in lengths.items():
+        if length < 3:
+            continue
+        activating_function = np.diff(np.stack([nodes_ve[key] for key in keys]), n=2, axis=1)
+        for key, peak, trough in zip(keys, activating_function.max(axis=1), (-activating_function).max(axis=1)):
+            peaks[key] = (diameters[key] if diameters is not None else diameter, peak, trough)
+    return peaks
+
+
+def fit_threshold_estimator(sim_name):
+    """Fit the thresholds of the fibers of an n_sim that already ran to the peaks of their activating function.
+
+    At threshold, the peak of the activating function times the stimamp is about the same for all fibers of a diameter,
+    and decreases with diameter: it is fit as a power of the diameter (a constant if all fibers have the same diameter).
+
+    :param sim_name: the string name of the n_sim
+    :return: the sign of the thresholds, the slope and intercept of the fit of the log of the peak of the activating
+        function times the threshold to the log of the diameter; None if no fiber of the n_sim already ran
+    """
+    thresholds = read_thresholds(os.path.join('n_sims', sim_name, 'data', 'outputs'))
+    peaks = get_activating_function_peaks(sim_name)
+    keys = [key for key, threshold in thresholds.items() if key in peaks and threshold != 0]
+    if len(keys) == 0:
+        return None
+    stimamps = np.array([thresholds[key] for key in keys])
+    sign = 1 if np.median(stimamps) > 0 else -1
+
+    # depolarizing peak: the maximum of the activating function for positive stimamps, of its negative otherwise
+    diameters = np.array([peaks[key][0] for key in keys], dtype=float)
+    drives = sign * stimamps * np.array([peaks[key][1 if sign > 0 else 2] for key in keys])
+    valid = drives > 0
+    if not np.any(valid):
+        return None
+    log_diameters, log_drives = np.log(diameters[valid]), np.log(drives[valid])
+    if len(np.unique(log_diameters)) > 1:
+        slope, intercept = np.polyfit(log_diameters, log_drives, 1)
+    else:
+        slope, intercept = 0.0, np.median(log_drives)
+    return sign, float(slope), float(intercept)
+
+
+def estimate_thresholds(sim_name, reference):
+    """Estimate the thresholds of all fibers of an n_sim from the peaks of their activating function.
+
+    :param sim_name: the string name of the n_sim
+    :param reference: the string name of the n_sim whose fibers that already ran calibrate the estimates (see
+        fit_threshold_estimator), with the same fiber model and waveform
+    :return: a dict of (inner, fiber) -> the estimated threshold, None if no fiber of the reference already ran
+    """
+    estimator = fit_threshold_estimator(reference)
+    if estimator is None:
+        return None
+    sign, slope, intercept = estimator
+
+    peaks = get_activating_function_peaks(sim_name)
+    keys = list(peaks)
+    diameters = np.array([peaks[key][0] for key in keys], dtype=float)
+    drives = np.array([peaks[key][1 if sign > 0 else 2] for key in keys])
+    valid = drives > 0
+    stimamps = sign * np.exp(intercept + slope * np.log(diameters[valid])) / drives[valid]
+    return dict(zip([key for key, is_valid in zip(keys, valid) if is_valid], stimamps.tolist()))
+
+
+def get_estimate_reference(sim_name, estimate):
+    """Get the n_sim whose fibers that already ran calibrate the threshold estimates of an n_sim.
+
+    :param sim_name: the string name of the n_sim
+    :param estimate: the "estimate" of the bounds search of the n_sim
+    :return: the string name of the n_sim with the same index of the reference Sim (by default, the n_sim itself)
+    """
+    sample, model, sim, n_sim = sim_name.split('_')
+    return f"{sample}_{estimate.get('model', model)}_{estimate.get('sim', sim)}_{n_sim}"
+
+
+def get_estimate_data(sim_name, sim_config):
+    """Get the estimated thresholds of the fibers of an n_sim, if "estimate" is defined in its bounds search.
+
+    :param sim_name: the string name of the n_sim
+    :param sim_config: the n_sim configuration
+    :return: a dict with the relative margin of the bounds (margin), the n_sim calibrating the estimates (reference),
+        and the estimated threshold of each fiber (thresholds, empty if no fiber of the reference already ran); None if
+        "estimate" is not defined
+    """
+    protocol = sim_config['protocol']
+    if protocol['mode'] not in ['ACTIVATION_THRESHOLD', 'BLOCK_THRESHOLD']:
+        return None
+    estimate = protocol['bounds_search'].get('estimate')
+    if estimate is None:
+        return None
+    reference = get_estimate_reference(sim_name, estimate)
+    return {
+        'margin': estimate.get('margin', 20) / 100,
+        'reference': reference,
+        'thresholds': estimate_thresholds(sim_name, reference) or {},
+    }
+
+
+def get_estimate_bounds(estimate_data, inner_ind, fiber_ind):
+    """Get the threshold bounds of a fiber from its estimated threshold, "margin" higher and lower than it.
+
+    :param estimate_data: the estimated thresholds of the fibers of the n_sim (see get_estimate_data), or None
+    :param inner_ind: the index of the inner this fiber is in
+    :param fiber_ind: the index of the fiber
+    :return: the upper and lower threshold bounds, None if the threshold of the fiber was not estimated
+    """
+    if estimate_data is None or (inner_ind, fiber_ind) not in estimate_data['thresholds']:
+        return None, None
+    stimamp = estimate_data['thresholds'][(inner_ind, fiber_ind)]
+    return (1 + estimate_data['margin']) * stimamp, (1 - estimate_data['margin']) * stimamp
+
+
+def select_estimate_seed_fibers(peaks):
+    """Select the fibers of an n_sim to run first, to calibrate the threshold estimates of the others.
+
+    For the smallest, median, and largest diameters, the fiber with the median peak of the activating function.
+
+    :param peaks: the diameter and the peaks of the activating function of each fiber (see
+        get_activating_function_peaks), as a list
+    :return: the indices of the seed fibers
+    """
+    diameters = np.array([peak[0] for peak in peaks], dtype=float)
+    unique_diameters = np.unique(diameters)
+    seeds = []
+    for diameter in unique_diameters[np.unique(np.linspace(0, len(unique_diameters) - 1, 3).round().astype(int))]:
+        candidates = np.flatnonzero(diameters == diameter)
+        order = np.argsort([max(peaks[candidate][1:]) for candidate in candidates], kind='stable')
+        seeds.append(int(candidates[order[len(order) // 2]]))
+    return seeds
+
+
+def report_estimated_thresholds(sim_names):
+    """Write the estimated thresholds of all fibers of each n_sim, and print their estimated recruitment.
+
+    The thresholds are estimated from the peaks of the activating function of each fiber (see estimate_thresholds),
+    calibrated by the fibers that already ran of the reference of "estimate" in the bounds search (by default, the
+    n_sim itself). The estimates are written to estimated_thresholds.csv, ordered by magnitude, with the fraction of
+    fibers of the n_sim recruited at each (recruitment).
+
+    :param sim_names: the string names of the n_sims
+    """
+    for sim_name in sim_names:
+        n_sim = sim_name.split('_')[-1]
+        sim_config = load_cached(os.path.join('n_sims', sim_name, f'{n_sim}.json'))
+        if sim_config['protocol']['mode'] not in ['ACTIVATION_THRESHOLD', 'BLOCK_THRESHOLD']:
+            print(f'{sim_name}: not a threshold protocol, skipping')
+            continue
+        reference = get_estimate_reference(sim_name, sim_config['protocol']['bounds_search'].get('estimate', {}))
+        thresholds = estimate_thresholds(sim_name, reference)
+        if thresholds is None:
+            print(f'{sim_name}: no fiber of {reference} already ran to calibrate the estimates, skipping')
+            continue
+        if len(thresholds) == 0:
+            print(f'{sim_name}: no fiber has a depolarizing peak of the activating function to estimate, skipping')
+            continue
+
+        peaks = get_activating_function_peaks(sim_name)
+        report = pd.DataFrame(
+            [(inner, fiber, peaks[(inner, fiber)][0], stimamp) for (inner, fiber), stimamp in thresholds.items()],
+            columns=['inner', 'fiber', 'diameter', 'est_threshold'],
+        )
+        report = report.iloc[np.argsort(np.abs(report['est_threshold'].to_numpy()), kind='stable')]
+        report['recruitment'] = np.arange(1, len(report) + 1) / len(report)
+        report.to_csv(os.path.join('n_sims', sim_name, 'estimated_thresholds.csv'), index=False)
+
+        # the smallest amplitudes recruiting each fraction of the fibers
+        quantiles = report['est_threshold'].to_numpy()[np.ceil(np.array([0.1, 0.5, 0.9]) * len(report)).astype(int) - 1]
+        print(
+            f'{sim_name}: estimated thresholds for {len(report)} fibers (calibrated by {reference}), '
+            f'recruiting 10/50/90%: ' + ', '.join(f'{stimamp:.6g}' for stimamp in quantiles)
+        )
+
+
+def select_seed_fibers(xy):
+    """Select the fibers of an inner to run first, spread over the inner, for the bounds of the others.
+
+    Farthest point sampling, from the fiber nearest to the centroid of the fibers, of ceil(sqrt(number of fibers)).
+
+    :param xy: the xy locations of the fibers (number of fibers x 2)
+    :return: the indices of the seed fibers
+    """
+    xy = np.asarray(xy, dtype=float)
+    seeds = [int(np.argmin(np.hypot(*(xy - xy.mean(axis=0)).T)))]
+    distances = np.hypot(*(xy - xy[seeds[0]]).T)
+    while len(seeds) < int(np.ceil(np.sqrt(len(xy)))):
+        seeds.append(int(np.argmax(distances)))
+        distances = np.minimum(distances, np.hypot(*(xy - xy[seeds[-1]]).T))
+    return seeds
+
+
+def split_seed_fibers(submission_list):
+    """Split the fibers to submit into seeds, to run first, and the others, whose bounds come from the seeds.
+
+    For n_sims whose bounds come from their own fibers that already ran (see get_neighbor_data), the inners with no
+    fiber that already ran have seeds (see select_seed_fibers). For n_sims whose threshold estimates are calibrated by
+    their own fibers that already ran (see get_estimate_data), if none did, the n_sim has seeds (see
+    select_estimate_seed_fibers).
+
+    :param submission_list: the dict of fibers to be submitted for each n_sim
+    :return: the dicts of seed fibers and of the other fibers to be submitted for each n_sim
+    """
+    seed_list, other_list = {}, {}
+    for sim_name, runfibers in submission_list.items():
+        n_sim = sim_name.split('_')[-1]
+        neighbor_data = get_neighbor_data(sim_name, load_cached(os.path.join('n_sims', sim_name, f'{n_sim}.json')))
+        seed_jobs = set()
+        if neighbor_data is not None and neighbor_data['reference'] == sim_name:
+            inner_fibers = {}
+            for fiber_data in runfibers:
+                key = (fiber_data['inner'], fiber_data['fiber'])
+                if fiber_data['inner'] not in neighbor_data['inners'] and key in neighbor_data['xy']:
+                    inner_fibers.setdefault(fiber_data['inner'], []).append(fiber_data)
+            for fibers in inner_fibers.values():
+                seeds = select_seed_fibers([neighbor_data['xy'][(fiber['inner'], fiber['fiber'])] for fiber in fibers])
+                seed_jobs.update(fibers[seed]['job_number'] for seed in seeds)
+        estimate_data = get_estimate_data(sim_name, load_cached(os.path.join('n_sims', sim_name, f'{n_sim}.json')))
+        if estimate_data is not None and estimate_data['reference'] == sim_name and not estimate_data['thresholds']:
+            peaks = get_activating_function_peaks(sim_name)
+            fibers = [fiber_data for fiber_data in runfibers if (fiber_data['inner'], fiber_data['fiber']) in peaks]
+            if len(fibers) > 0:
+                seeds = select_estimate_seed_fibers([peaks[(fiber['inner'], fiber['fiber'])] for fiber in fibers])
+                seed_jobs.update(fibers[seed]['job_number'] for seed in seeds)
+        seed_list[sim_name] = [fiber_data for fiber_data in runfibers if fiber_data['job_number'] in seed_jobs]
+        other_list[sim_name] = [fiber_data for fiber_data in runfibers if fiber_data['job_number'] not in seed_jobs]
+    return seed_list, other_list
+
+
 def make_task(
     sub_con: str,
     my_os: str,
@@ -383,6 +901,7 @@ def make_task(
     diam: float,
     deltaz: float,
     axonnodes: int,
+    batch_fname: str = None,
 ):
     """Create shell script used to run a fiber simulation.
 
@@ -397,7 +916,14 @@ def make_task(
     :param diam: the diameter of the fiber
     :param deltaz: the deltaz for the fiber
     :param axonnodes: the number of axon nodes
+    :param batch_fname: the path (relative to the sim_dir) to the other fibers to run in the same NEURON process
     """
+    # the other fibers of the batch are run by FiberBatch.hoc after this one
+    batch_args = (
+        f'-c \"strdef fiber_batch_fname\" -c \"fiber_batch_fname=\\\"{batch_fname}\\\"\" '
+        if batch_fname is not None
+        else ''
+    )
     with open(start_p, 'w+') as handle:
         if my_os == 'UNIX-LIKE':
             lines = [
@@ -416,15 +942,14 @@ def make_task(
                 f'-c \"axonnodes={axonnodes}\" '
                 '-c \"saveflag_end_ap_times=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
                 '-c \"saveflag_runtime=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
+                '-c \"flag_binary_inputs=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
+                '-c \"early_stop_flag=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
+                f'{batch_args}'
                 '-c \"load_file(\\\"launch.hoc\\\")\" blank.hoc\n',
             ]
             if sub_con != 'cluster':
                 lines.remove(f'cd "{sim_p}\"\n')
 
-            # copy special files ahead of time to avoid 'text file busy error'
-            if not os.path.exists('special'):
-                shutil.copy(os.path.join('MOD_Files', 'x86_64', 'special'), sim_p)
-
         else:  # OS is 'WINDOWS'
             sim_path_win = os.path.join(*sim_p.split(os.pathsep)).replace('\\', '\\\\')
             main_path_win = os.getcwd().replace('\\', '/')
@@ -442,7 +967,10 @@ def make_task(
                 f'-c \"axonnodes={axonnodes}\" '
                 '-c \"saveflag_end_ap_times=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
                 '-c \"saveflag_runtime=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
+                '-c \"flag_binary_inputs=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
+                '-c \"early_stop_flag=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
                 '-c \"saveflag_ap_loctime=0\" '  # for backwards compatible, overwritten in launch.hoc if 1
+                f'{batch_args}'
                 '-c \"load_file(\\\"launch.hoc\\\")\" blank.hoc\n'
             ]
 
@@ -451,73 +979,101 @@ def make_task(
 
 
 def local_submit(fiber_data: dict):
-    """Submit a fiber simulation to the local machine.
+    """Submit a fiber simulation (or a batch of fibers) to the local machine.
 
-    :param fiber_data: the dictionary of fiber data for suvbmission
+    :param fiber_data: the dictionary of fiber data for submission, including the path to its n_sim (sim_path)
+    :return: the fiber data, once its simulation has completed
     """
-    a = fiber_data["job_number"]
-    out_path = os.path.join('logs', 'out', f'{a}.log')
-    err_path = os.path.join('logs', 'err', f'{a}.log')
+    a, sim_path = fiber_data["job_number"], fiber_data["sim_path"]
+    out_path = os.path.join(sim_path, 'logs', 'out', f'{a}.log')
+    err_path = os.path.join(sim_path, 'logs', 'err', f'{a}.log')
     start = os.path.join('start_scripts', f'start_{a}')
+    if fiber_data.get('manifest'):
+        # the launcher finds the parameters of the fiber in the n_sim manifest, and runs from the n_sim directory
+        command, cwd = ['bash', 'launch_fiber.sh', sim_path, str(a)], None
+    elif OS == 'UNIX-LIKE':
+        command, cwd = ['bash', start + '.sh'], sim_path
+    else:
+        command, cwd = [os.path.abspath(os.path.join(sim_path, start + '.bat'))], sim_path
+    # run from the n_sim directory without changing the working directory of submit.py (shared by all tasks)
     with open(out_path, "w+") as fo, open(err_path, "w+") as fe:
-        subprocess.run(['bash', start + '.sh'] if OS == 'UNIX-LIKE' else [start + '.bat'], stdout=fo, stderr=fe)
+        subprocess.run(command, stdout=fo, stderr=fe, cwd=cwd)
 
     # print fiber completion
     if fiber_data['verbose']:
-        print(f'Completed NEURON simulation for inner {fiber_data["inner"]} fiber {fiber_data["fiber"]}.')
+        print(
+            f'Completed NEURON simulation for inner {fiber_data["inner"]} fiber {fiber_data["fiber"]}'
+            + ''.join(f', inner {other["inner"]} fiber {other["fiber"]}' for other in fiber_data.get('batch', []))
+            + '.'
+        )
+    return fiber_data
+
+
+def local_cpus():
+    """Get the number of CPUs to use for local submission.
+
+    :raises ValueError: IF the specified cpu count is higher than the number of cores on the machine
+    :return: the number of CPUs
+    """
+    if args.num_cpu is not None:
+        cpus = args.num_cpu
+
+        if cpus > multiprocessing.cpu_count() - 1:
+            raise ValueError('num_cpu argument is more than cpu_count-1 CPUs')
+
+        print(f"Submitting locally to {cpus} CPUs")
+
+    else:
+        cpus = int(multiprocessing.cpu_count() / 2)
+        warnings.warn(
+            f"You did not define number of cores to use (-n), so proceeding with int(cpu_core_count/2)={cpus}",
+            stacklevel=2,
+        )
+    return cpus
 
 
 def submit_fibers(submission_context, submission_data):
     """Submit fiber simulations, either locally or to a cluster.
 
+    Locally, the fibers of all n_sims are queued to one pool, which keeps every CPU busy until all fibers have run,
+    longest estimated runtime first (see make_fiber_tasks).
+
     :param submission_context: the string name of the submission_context
-    :param submission_data: the dictionary of data for fiber submission
-    :raises ValueError: IF the specified cpu count is higher than the number of cores on the machine
+    :param submission_data: the dictionary of data for fiber submission (tasks, which may be batches of fibers)
     """
     # configuration is not empty
-    ran_fibers = 0
     sim_dir = os.path.join('n_sims')
-    n_fibers = sum(len(v) for v in submission_data.values())
+    n_fibers = sum(1 + len(task.get('batch', [])) for v in submission_data.values() for task in v)
 
     progress_bar = tqdm(total=n_fibers, dynamic_ncols=True, disable=args.verbose, desc='Fibers submitted')
 
+    local_tasks = []
     for sim_name, runfibers in submission_data.items():
-        if args.verbose:
-            print(f'\n\n################ {sim_name} ################\n\n')
         # skip if no fibers to run for this nsim
         if len(runfibers) == 0:
             continue
         sim_path = os.path.join(sim_dir, sim_name)
-        start_dir = os.path.join(sim_path, 'start_scripts')
-        start_path_base = os.path.join(start_dir, 'start_')
 
         if submission_context == 'cluster':
+            if args.verbose:
+                print(f'\n\n################ {sim_name} ################\n\n')
+            # array_launch.slurm runs the start scripts with this prefix, or launch_fiber.sh for an n_sim directory
+            start_path_base = sim_path if args.manifest else os.path.join(sim_path, 'start_scripts', 'start_')
             cluster_submit(runfibers, sim_name, sim_path, start_path_base)
-            ran_fibers += len(runfibers)
-            progress_bar.update(len(runfibers))
+            progress_bar.update(sum(1 + len(task.get('batch', [])) for task in runfibers))
         else:
-            if args.num_cpu is not None:
-                cpus = args.num_cpu
-
-                if cpus > multiprocessing.cpu_count() - 1:
-                    raise ValueError('num_cpu argument is more than cpu_count-1 CPUs')
+            local_tasks.extend(
+                {**fiber_data, 'sim_path': sim_path, 'verbose': args.verbose, 'manifest': args.manifest}
+                for fiber_data in runfibers
+            )
 
-                print(f"Submitting locally to {cpus} CPUs")
-
-            else:
-                cpus = int(multiprocessing.cpu_count() / 2)
-                warnings.warn(
-                    f"You did not define number of cores to use (-n), so proceeding with int(cpu_core_count/2)={cpus}",
-                    stacklevel=2,
-                )
-            os.chdir(sim_path)
-            with multiprocessing.Pool(cpus) as p:
-                for x in runfibers:
-                    x['verbose'] = args.verbose
-                # open pool instance, set up progress bar, and iterate over each job
-                for _ in p.imap_unordered(local_submit, runfibers, 1):
-                    progress_bar.update(1)
-            os.chdir("../..")
+    if len(local_tasks) > 0:
+        # longest fibers first, so that the last fibers to finish are short
+        local_tasks.sort(key=lambda task: task.get('est_runtime', 0), reverse=True)
+        # the workers only wait for their NEURON processes, so threads are enough
+        with multiprocessing.pool.ThreadPool(local_cpus()) as p:
+            for task in p.imap_unordered(local_submit, local_tasks, 1):
+                progress_bar.update(1 + len(task.get('batch', [])))
 
 
 def cluster_submit(runfibers, sim_name, sim_path, start_path_base):
@@ -526,7 +1082,7 @@ def cluster_submit(runfibers, sim_name, sim_path, start_path_base):
     :param runfibers: the list of fiber data for submission
     :param sim_name: the string name of the n_sim
     :param sim_path: the string path to the simulation
-    :param start_path_base: the string prefix for all start scripts
+    :param start_path_base: the string prefix for all start scripts, or the n_sim path to run its manifest
     """
     slurm_params = load(os.path.join('config', 'system', 'slurm_params.json'))
     out_dir = os.path.abspath(os.path.join(sim_path, 'logs', 'out', '%a.log'))
@@ -574,15 +1130,157 @@ def cluster_submit(runfibers, sim_name, sim_path, start_path_base):
         time.sleep(1.0)
 
 
-def make_fiber_tasks(submission_list, submission_context):
+def get_runtime_scale(sim_name, sim_config, fibers_path, output_path, potentials_index, n_tsteps, n_max=20):
+    """Calibrate the costs of the fibers of an n_sim to runtimes with the runtimes of its fibers that already ran.
+
+    :param sim_name: the string name of the n_sim
+    :param sim_config: the n_sim configuration
+    :param fibers_path: the path to the n_sim inputs
+    :param output_path: the path to the n_sim outputs
+    :param potentials_index: the binary potentials index of the n_sim (see read_potentials_index), None if text
+    :param n_tsteps: the number of time steps of the n_sim
+    :param n_max: the maximum number of runtimes to calibrate with
+    :return: the median runtime per unit of cost (in seconds), None if no fiber of the n_sim saved its runtime
+    """
+    scales = []
+    for (inner_ind, fiber_ind), runtime in sorted(read_runtimes(output_path).items())[:n_max]:
+        cuff_type = (
+            ['src'] if os.path.exists(os.path.join(fibers_path, f'src_inner{inner_ind}_fiber{fiber_ind}.dat')) else []
+        )
+        n_fiber_coords = get_n_fiber_coords(fibers_path, potentials_index, cuff_type, inner_ind, fiber_ind)
+        top, bottom = get_thresh_bounds(os.path.join('n_sims'), sim_name, inner_ind)
+        scales.append(runtime / (n_fiber_coords * n_tsteps * get_protocol_runs(sim_config, top, bottom)))
+    return float(np.median(scales)) if len(scales) > 0 else None
+
+
+def make_fiber_task(fiber_data, submission_context, sim_name, nsim_data, manifest=False, batch_fname=None):
+    """Create the shell script of a fiber submission task.
+
+    :param fiber_data: the dictionary of fiber data for submission
+    :param submission_context: the string name of the submission_context
+    :param sim_name: the string name of the n_sim
+    :param nsim_data: the dictionary of the data shared by the fibers of the n_sim (see make_fiber_tasks)
+    :param manifest: if True, only return the parameters of the fiber, without writing its start script
+    :param batch_fname: the path (relative to the n_sim) to the other fibers to run in the same NEURON process
+    :return: the parameters of the fiber (its row of the manifest, formatted as in its start script),
+        None if it has no bounds
+    """
+    cuff_type, inner_ind, fiber_ind = fiber_data['cuff_type'], fiber_data['inner'], fiber_data['fiber']
+
+    if nsim_data['diameters'] is not None:
+        diameter = nsim_data['diameters'][(inner_ind, fiber_ind)]
+    else:
+        diameter = nsim_data['diameter']
+    deltaz, neuron_flag = get_deltaz(nsim_data['fiber_model'], diameter)
+
+    n_fiber_coords = get_n_fiber_coords(
+        nsim_data['fibers_path'], nsim_data['potentials_index'], cuff_type, inner_ind, fiber_ind
+    )
+
+    if neuron_flag == 2:
+        axonnodes = int(1 + (n_fiber_coords - 1) / 11)
+    elif neuron_flag == 3:
+        axonnodes = int(n_fiber_coords)
+
+    start_path = f"{nsim_data['start_path_base']}{fiber_data['job_number']}{'.sh' if OS == 'UNIX-LIKE' else '.bat'}"
+
+    # bounds from the fibers nearest to this one that already ran, if any (see get_neighbor_data), else from the
+    # estimated threshold of this fiber, if any (see get_estimate_data)
+    stimamp_top, stimamp_bottom = get_neighbor_bounds(nsim_data['neighbors'], inner_ind, fiber_ind)
+    if stimamp_top is None:
+        stimamp_top, stimamp_bottom = get_estimate_bounds(nsim_data['estimate'], inner_ind, fiber_ind)
+    if stimamp_top is None:
+        stimamp_top, stimamp_bottom = get_thresh_bounds(os.path.join('n_sims'), sim_name, inner_ind)
+    if stimamp_top is not None and stimamp_bottom is not None:
+        # relative cost of the fiber: compartments x time steps x NEURON runs
+        fiber_data['cost'] = (
+            n_fiber_coords
+            * nsim_data['n_tsteps']
+            * get_protocol_runs(nsim_data['sim_config'], stimamp_top, stimamp_bottom)
+        )
+        if not manifest:
+            make_task(
+                submission_context,
+                OS,
+                start_path,
+                nsim_data['sim_path'],
+                inner_ind,
+                fiber_ind,
+                stimamp_top,
+                stimamp_bottom,
+                diameter,
+                deltaz,
+                axonnodes,
+                batch_fname,
+            )
+        return [
+            fiber_data['job_number'],
+            inner_ind,
+            fiber_ind,
+            stimamp_top,
+            stimamp_bottom,
+            f'{diameter:.6f}',
+            f'{deltaz:.4f}',
+            axonnodes,
+        ]
+    return None
+
+
+def make_fiber_batches(runfibers, batch_runtime):
+    """Pack the fibers of an n_sim into batches of about a target estimated runtime, each run by one NEURON process.
+
+    Fibers are packed longest estimated runtime first, so batches are filled in order; a fiber longer than the target
+    is a batch of its own. Fibers with no runtime estimate (no bounds) are not batched, and come last.
+
+    :param runfibers: the list of fiber data for submission, with their est_runtime (see make_fiber_tasks)
+    :param batch_runtime: the target estimated runtime of a batch (in seconds)
+    :return: the list of tasks: the data of the first fiber of each batch, with the other fibers of the batch (batch)
+        and the estimated runtime of the whole batch (est_runtime)
+    """
+    batches, batch, total = [], [], 0
+    for fiber_data in sorted(
+        (fiber for fiber in runfibers if 'est_runtime' in fiber), key=lambda fiber: fiber['est_runtime'], reverse=True
+    ):
+        if len(batch) > 0 and total + fiber_data['est_runtime'] > batch_runtime:
+            batches.append(batch)
+            batch, total = [], 0
+        batch.append(fiber_data)
+        total += fiber_data['est_runtime']
+    if len(batch) > 0:
+        batches.append(batch)
+    batches.extend([fiber_data] for fiber_data in runfibers if 'est_runtime' not in fiber_data)
+    return [
+        {**batch[0], 'batch': batch[1:], 'est_runtime': sum(fiber.get('est_runtime', 0) for fiber in batch)}
+        for batch in batches
+    ]
+
+
+def make_fiber_tasks(
+    submission_list, submission_context, workers: int = None, manifest: bool = False, batch_runtime: float = None
+):
     """Create all shell scripts for fiber submission tasks.
 
+    The data shared by the fibers of each n_sim (e.g., its configuration, diameters) is loaded once, then the scripts
+    of all fibers are created by a pool of threads.
+
+    Also estimates the runtime of each fiber (est_runtime), from its cost (compartments x time steps x NEURON runs),
+    calibrated by the runtimes saved by the fibers that already ran (or roughly by DEFAULT_RUNTIME_SCALE if none did).
+
+    If batching, the fibers of each n_sim in submission_list are replaced by batches (see make_fiber_batches): the
+    start script of the first fiber of a batch (or launch_fiber.sh) also runs the other fibers of the batch, listed in
+    start_scripts/batch_<job_number>.dat.
+
     :param submission_list: the list of fibers to be submitted
     :param submission_context: the string name of the submission_context
+    :param workers: number of threads creating scripts (defaults to that of concurrent.futures.ThreadPoolExecutor)
+    :param manifest: if True (UNIX-like only), write the parameters of the fibers of each n_sim to its manifest
+        (fiber_tasks.csv, run by launch_fiber.sh) instead of writing a start script per fiber
+    :param batch_runtime: if not None, the target estimated runtime (in seconds) of batches of fibers
     """
     # assign appropriate configuration data
     sim_dir = os.path.join('n_sims')
-    for sim_name, runfibers in submission_list.items():
+    nsims_data = {}
+    for sim_name in submission_list:
         sim_path = os.path.join(sim_dir, sim_name)
         fibers_path = os.path.abspath(os.path.join(sim_path, 'data', 'inputs'))
         output_path = os.path.abspath(os.path.join(sim_path, 'data', 'outputs'))
@@ -601,71 +1299,109 @@ def make_fiber_tasks(submission_list, submission_context):
         ]:
             ensure_dir(cur_dir)
 
+        # remove the batches of previous submissions, which would otherwise still be run by launch_fiber.sh
+        for batch_path in glob.glob(os.path.join(start_dir, 'batch_*.dat')):
+            os.remove(batch_path)
+
         # ensure blank.hoc exists
         blank_path = os.path.join(sim_path, 'blank.hoc')
         if not os.path.exists(blank_path):
             with open(blank_path, 'w'):
                 pass
 
+        # copy special files ahead of time to avoid 'text file busy error'
+        if OS == 'UNIX-LIKE' and not os.path.exists('special'):
+            shutil.copy(os.path.join('MOD_Files', 'x86_64', 'special'), sim_path)
+
         # load JSON file with bisection search amplitudes
         n_sim = sim_name.split('_')[-1]
-        sim_config = load(os.path.join(sim_path, f'{n_sim}.json'))
-        fiber_model = sim_config['fibers']['mode']
+        sim_config = load_cached(os.path.join(sim_path, f'{n_sim}.json'))
 
         # load the inner x fiber -> diam key saved in the n_sim folder
-        inner_fiber_diam_key_file = os.path.join(fibers_path, 'inner_fiber_diam_key.obj')
-        inner_fiber_diam_key = None
-        if os.path.exists(inner_fiber_diam_key_file):
-            with open(inner_fiber_diam_key_file, 'rb') as f:
-                inner_fiber_diam_key = pickle.load(f)
-            f.close()
-        else:
-            diameter = sim_config['fibers']['z_parameters']['diameter']
+        diameters, diameter = read_nsim_diameters(fibers_path, sim_config)
+
+        nsims_data[sim_name] = {
+            'sim_path': sim_path,
+            'fibers_path': fibers_path,
+            'output_path': output_path,
+            'start_path_base': start_path_base,
+            'sim_config': sim_config,
+            'fiber_model': sim_config['fibers']['mode'],
+            'diameters': diameters,
+            'diameter': diameter,
+            # binary potentials index, holds the number of coordinates of every fiber
+            'potentials_index': read_potentials_index(fibers_path),
+            'n_tsteps': get_n_tsteps(fibers_path),
+            'neighbors': get_neighbor_data(sim_name, sim_config),
+            'estimate': get_estimate_data(sim_name, sim_config),
+        }
+
+    nsims_rows = {}
+    with ThreadPoolExecutor(workers) as executor:
+        futures = {
+            sim_name: [
+                executor.submit(
+                    make_fiber_task, fiber_data, submission_context, sim_name, nsims_data[sim_name], manifest
+                )
+                for fiber_data in runfibers
+            ]
+            for sim_name, runfibers in submission_list.items()
+        }
+        for sim_name, nsim_futures in futures.items():
+            rows = [future.result() for future in nsim_futures]
+            nsims_rows[sim_name] = {row[0]: row for row in rows if row is not None}
+            if manifest:
+                pd.DataFrame(
+                    [row for row in rows if row is not None],
+                    columns=[
+                        'job_number',
+                        'inner',
+                        'fiber',
+                        'stimamp_top',
+                        'stimamp_bottom',
+                        'fiberD',
+                        'deltaz',
+                        'axonnodes',
+                    ],
+                ).to_csv(os.path.join(nsims_data[sim_name]['sim_path'], 'fiber_tasks.csv'), index=False)
+
+    runtime_scales = {
+        sim_name: get_runtime_scale(
+            sim_name,
+            nsim_data['sim_config'],
+            nsim_data['fibers_path'],
+            nsim_data['output_path'],
+            nsim_data['potentials_index'],
+            nsim_data['n_tsteps'],
+        )
+        for sim_name, nsim_data in nsims_data.items()
+    }
 
+    # n_sims with no runtimes use the median runtime scale of the others, so that all estimates are comparable
+    known_scales = [scale for scale in runtime_scales.values() if scale is not None]
+    default_scale = float(np.median(known_scales)) if len(known_scales) > 0 else DEFAULT_RUNTIME_SCALE
+    for sim_name, runfibers in submission_list.items():
+        scale = runtime_scales.get(sim_name) or default_scale
         for fiber_data in runfibers:
-            cuff_type, inner_ind, fiber_ind = fiber_data['cuff_type'], fiber_data['inner'], fiber_data['fiber']
-
-            if inner_fiber_diam_key is not None:
-                diameter = get_diameter(inner_fiber_diam_key, inner_ind, fiber_ind)
-            deltaz, neuron_flag = get_deltaz(fiber_model, diameter)
+            if 'cost' in fiber_data:
+                fiber_data['est_runtime'] = fiber_data['cost'] * scale
 
-            # get the axonnodes from data/inputs/inner{}_fiber{}.dat top line
-            if cuff_type:
-                fiber_ve_path = os.path.join(
-                    fibers_path,
-                    f'{cuff_type[0]}_inner{inner_ind}_fiber{fiber_ind}.dat',
-                )
-            else:  # Backwards compatibility
-                fiber_ve_path = os.path.join(
-                    fibers_path,
-                    f'inner{inner_ind}_fiber{fiber_ind}.dat',
-                )
+    if batch_runtime is None:
+        return
 
-            fiber_ve = np.loadtxt(fiber_ve_path)
-            n_fiber_coords = int(fiber_ve[0])
-
-            if neuron_flag == 2:
-                axonnodes = int(1 + (n_fiber_coords - 1) / 11)
-            elif neuron_flag == 3:
-                axonnodes = int(n_fiber_coords)
-
-            start_path = f"{start_path_base}{fiber_data['job_number']}{'.sh' if OS == 'UNIX-LIKE' else '.bat'}"
-
-            stimamp_top, stimamp_bottom = get_thresh_bounds(sim_dir, sim_name, inner_ind)
-            if stimamp_top is not None and stimamp_bottom is not None:
-                make_task(
-                    submission_context,
-                    OS,
-                    start_path,
-                    sim_path,
-                    inner_ind,
-                    fiber_ind,
-                    stimamp_top,
-                    stimamp_bottom,
-                    diameter,
-                    deltaz,
-                    axonnodes,
-                )
+    for sim_name, runfibers in submission_list.items():
+        nsim_data, rows = nsims_data[sim_name], nsims_rows[sim_name]
+        submission_list[sim_name] = make_fiber_batches(runfibers, batch_runtime)
+        for task in submission_list[sim_name]:
+            if len(task['batch']) == 0:
+                continue
+            # one fiber per line (as in the manifest, without the job number), after the number of fibers
+            batch_fname = f"start_scripts/batch_{task['job_number']}.dat"
+            with open(os.path.join(nsim_data['sim_path'], batch_fname), 'w') as handle:
+                handle.write(f"{len(task['batch'])}\n")
+                for fiber_data in task['batch']:
+                    handle.write(' '.join(str(value) for value in rows[fiber_data['job_number']][1:]) + '\n')
+            make_fiber_task(task, submission_context, sim_name, nsim_data, manifest, batch_fname)
 
 
 def make_run_sub_list(run_number: int):
@@ -703,9 +1439,15 @@ def make_run_sub_list(run_number: int):
                     n_sim = sim_name.split('_')[-1]
                     sim_config = load(os.path.join(sim_path, f'{n_sim}.json'))
 
-                    fibers_files = [
-                        x for x in os.listdir(fibers_path) if re.match('(?:(src)_)?inner[0-9]+_fiber[0-9]+\\.dat', x)
-                    ]  # First regex group with ? is optional - for backwards compatibility
+                    potentials_index = read_potentials_index(fibers_path)
+                    if potentials_index is not None:
+                        fibers_files = [f'src_inner{inner}_fiber{fiber}' for inner, fiber in potentials_index]
+                    else:
+                        fibers_files = [
+                            x
+                            for x in os.listdir(fibers_path)
+                            if re.match('(?:(src)_)?inner[0-9]+_fiber[0-9]+\\.dat', x)
+                        ]  # First regex group with ? is optional - for backwards compatibility
 
                     for i, fiber_filename in enumerate(fibers_files):
                         master_fiber_name = str(fiber_filename.split('.')[0])
@@ -825,6 +1567,8 @@ def pre_submit_setup():
     if len(args.run_indices) == 0:
         sys.exit("Error: No run indices to use.")
     run_inds = args.run_indices
+    if args.manifest and OS != 'UNIX-LIKE':
+        sys.exit('Error: -M/--manifest requires bash, so is only available on UNIX-like systems.')
     # compile MOD files if they have not yet been compiled
     auto_compile(args.force_recompile)
     # check for submission context
@@ -845,12 +1589,25 @@ def main():
     run_inds, submission_context = pre_submit_setup()
     # get list of simulations to be submitted
     rundata, submission_list = get_submission_list(run_inds)
+    if args.estimate_report:
+        report_estimated_thresholds(submission_list)
+        return
     # confirm that the user wants to submit the simulations
     n_fibers = sum([len(x) for x in submission_list.values()])
     confirm_submission(n_fibers, rundata, submission_context)
+    # seed fibers run first, so that the bounds of the others come from their thresholds (see get_neighbor_data)
+    seed_list, submission_list = split_seed_fibers(submission_list)
+    if any(len(x) > 0 for x in seed_list.values()):
+        print('Performing setup for seed fiber submission...')
+        make_fiber_tasks(seed_list, submission_context, manifest=args.manifest, batch_runtime=args.batch_runtime)
+        print('Submitting seed fibers...')
+        submit_fibers(submission_context, seed_list)
+        if submission_context == 'cluster':
+            print('Submitted seed fibers only. Submit again once they have finished to submit the other fibers.')
+            return
     # make shell scripts for fiber submission
     print('Performing setup for fiber submission...')
-    make_fiber_tasks(submission_list, submission_context)
+    make_fiber_tasks(submission_list, submission_context, manifest=args.manifest, batch_runtime=args.batch_runtime)
     # submit fibers
     print('Submitting...')
     submit_fibers(submission_context, submission_list)
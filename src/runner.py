@@ -331,7 +331,7 @@ class Runner(Configurable):
 
         # load up correct simulation and build required sims
         simulation: Simulation = self.load_obj(sim_obj_path)
-        simulation.build_n_sims(sim_dir, sim_num)
+        simulation.build_n_sims(sim_dir, sim_num, workers=self.configs[Config.CLI_ARGS.value].get('nsim_workers') or 1)
 
         # get export behavior
         if self.configs[Config.CLI_ARGS.value].get('export_behavior') is not None:
@@ -405,6 +405,11 @@ class Runner(Configurable):
                                 source_sim_obj_dir = self.validate_supersample(simulation, sample_num, model_num)
                                 self.ss_bases_exist.append(simulation.ss_bases_exist(source_sim_obj_dir))
 
+                        # COMSOL reads the coordinates of each fiber from its own file, derived for columnar fibersets
+                        potentials_exist = simulation.bases_potentials_exist(sim_obj_dir)
+                        if not potentials_exist or not simulation.ss_bases_exist(sim_obj_dir):
+                            simulation.write_fiber_files(sim_obj_dir)
+
             if self.configs[Config.CLI_ARGS.value].get('break_point') == 'pre_java' or (
                 ('break_points' in self.configs[Config.RUN.value])
                 and self.search(Config.RUN, 'break_points').get('pre_java') is True
@@ -69,6 +69,13 @@ pipeline_parser.add_argument(
     choices=["overwrite", "error", "selective"],
     help="Behavior if n_sim export encounters extant data. Default is selective.",
 )
+pipeline_parser.add_argument(
+    '-N',
+    '--nsim-workers',
+    type=int,
+    default=1,
+    help="Number of processes used to generate n_sims after the bases are solved. Default is 1.",
+)
 pipeline_parser.add_argument(
     '-e',
     '--endo-only-solution',
@@ -10,6 +10,7 @@ The source code can be found on the following GitHub repository: https://github.
 from .configurable import Configurable
 from .enums import *
 from .errors import *
+from .object_cache import ObjectCache
 from .saveable import Saveable
 
-__all__ = ['Configurable', 'Saveable']
+__all__ = ['Configurable', 'ObjectCache', 'Saveable']
@@ -279,6 +279,18 @@ class ExportMode(ASCENTEnum, Enum):
     SELECTIVE = "selective"
 
 
+@unique
+class InputsFormat(ASCENTEnum, Enum):
+    TEXT = 0
+    BINARY = 1
+
+
+@unique
+class FiberSetFormat(ASCENTEnum, Enum):
+    TEXT = 0
+    COLUMNAR = 1
+
+
 # %% NEURON Protocols
 
 
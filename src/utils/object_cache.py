@@ -0,0 +1,79 @@
+#!/usr/bin/env python3.7
+
+"""Defines the ObjectCache class.
+
+The copyrights of this software are owned by Duke University.
+Please refer to the LICENSE and README.md files for licensing instructions.
+The source code can be found on the following GitHub repository: https://github.com/wmglab-duke/ascent
+"""
+
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+
+class ObjectCache:
+    """Least recently used cache of pickled objects (e.g., sample.obj, sim.obj), keyed by path and modification time.
+
+    An object is unpickled again if its file was modified since it was cached. Cached objects are shared by every
+    caller that loads them, so they should not be modified.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        """Initialize an empty cache.
+
+        :param maxsize: maximum number of objects kept, the least recently used are evicted first (0 disables caching)
+        """
+        self.maxsize = maxsize
+        self._objects: OrderedDict[str, tuple[int, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path: str):
+        """Load a pickled object, from the cache if its file was not modified since it was cached.
+
+        :param path: The path to the pickled object.
+        :return: The object.
+        """
+        key, mtime = os.path.abspath(path), os.stat(path).st_mtime_ns
+        with self._lock:
+            if key in self._objects and self._objects[key][0] == mtime:
+                self._objects.move_to_end(key)
+                return self._objects[key][1]
+
+        with open(path, 'rb') as file:
+            obj = pickle.load(file)
+
+        with self._lock:
+            self._objects[key] = (mtime, obj)
+            self._objects.move_to_end(key)
+            while len(self._objects) > self.maxsize:
+                self._objects.popitem(last=False)
+
+        return obj
+
+    def clear(self):
+        """Remove all objects from the cache."""
+        with self._lock:
+            self._objects.clear()
+
+    def __len__(self):
+        """Get the number of cached objects.
+
+        :return: The number of cached objects.
+        """
+        return len(self._objects)
+
+    def __getstate__(self):
+        """Pickle the cache without its objects (e.g., when saving a Query).
+
+        :return: The state of the cache.
+        """
+        return {'maxsize': self.maxsize}
+
+    def __setstate__(self, state: dict):
+        """Restore an empty cache.
+
+        :param state: The state of the cache.
+        """
+        self.__init__(state['maxsize'])
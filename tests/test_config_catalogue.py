@@ -0,0 +1,41 @@
+"""Tests the config_catalogue module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import json
+import os
+
+from src.core.config_catalogue import ConfigCatalogue
+
+
+def test_values(tmp_path):
+    """Test looking up the values at key paths of catalogued configs, after they are modified.
+
+    :param tmp_path: Temporary directory for the configs and the catalogue.
+    """
+    paths = [str(tmp_path / f'{i}.json') for i in range(2)]
+    for path, config in zip(paths, [{'a': {'b': 1, 'c': [1, 2]}}, {'a': {'b': 'x'}, 'd': None}]):
+        with open(path, 'w') as file:
+            json.dump(config, file)
+
+    catalogue = ConfigCatalogue(str(tmp_path / 'catalogue.db'))
+    catalogue.refresh(paths)
+    assert catalogue.values(('a', 'b')) == {paths[0]: 1, paths[1]: 'x'}
+    assert catalogue.values(('a', 'c')) == {paths[0]: [1, 2]}
+    assert catalogue.values(('a',)) == {paths[0]: {}, paths[1]: {}}
+    assert catalogue.values(('d',)) == {paths[1]: None}
+    catalogue.close()
+
+    # a modified config is catalogued again when the catalogue is next opened
+    with open(paths[0], 'w') as file:
+        json.dump({'a': {'b': 2}}, file)
+    os.utime(paths[0], ns=(0, os.stat(paths[0]).st_mtime_ns + 1))
+    catalogue = ConfigCatalogue(str(tmp_path / 'catalogue.db'))
+    catalogue.refresh(paths)
+    assert catalogue.values(('a', 'b')) == {paths[0]: 2, paths[1]: 'x'}
+    assert catalogue.values(('a', 'c')) == {}
+    catalogue.close()
@@ -0,0 +1,84 @@
+"""Tests the fiberset module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from src.core.fiberset import FiberSet, FiberSetCoords
+from src.core.simulation import Simulation, get_z_coords
+from src.utils import WriteMode
+
+
+@pytest.fixture
+def basic_fiberset():
+    """Create a fiberset of three fibers with different numbers of coordinates.
+
+    :return: FiberSet object.
+    """
+    fiberset = FiberSet(None)
+    fiberset.fibers = [
+        {'diam': None, 'offset_ratio': None, 'fiber': [[x, 2 * x, 0.1 * z] for z in range(n_coords)]}
+        for x, n_coords in [(0.5, 4), (-1.25, 7), (3.0, 1)]
+    ]
+    return fiberset
+
+
+def test_write_coords(basic_fiberset, tmp_path):
+    """Test that the columnar coordinates match the fiber files.
+
+    :param basic_fiberset: Generic fiberset.
+    :param tmp_path: Temporary directory for the fiberset.
+    """
+    basic_fiberset.write(WriteMode.DATA, str(tmp_path))
+    assert FiberSetCoords.exists(str(tmp_path))
+
+    fiberset_coords = FiberSetCoords(str(tmp_path))
+    assert len(fiberset_coords) == 3
+    for fiber_ind, fiber in enumerate(basic_fiberset.fibers):
+        fiber_file = os.path.join(str(tmp_path), f'{fiber_ind}.dat')
+        assert np.array_equal(fiberset_coords.fiber(fiber_ind), np.loadtxt(fiber_file, skiprows=1, ndmin=2))
+        assert np.array_equal(fiberset_coords.z(fiber_ind), np.array(fiber['fiber'])[:, 2])
+        assert np.shares_memory(fiberset_coords.z(fiber_ind), fiberset_coords.coords)
+        assert np.array_equal(get_z_coords(str(tmp_path), f'{fiber_ind}.dat'), fiberset_coords.z(fiber_ind))
+
+
+def test_coords_from_fiber_files(basic_fiberset, tmp_path):
+    """Test reading the coordinates of a fiberset written before the columnar coordinates.
+
+    :param basic_fiberset: Generic fiberset.
+    :param tmp_path: Temporary directory for the fiberset.
+    """
+    basic_fiberset.write(WriteMode.DATA, str(tmp_path))
+    expected = FiberSetCoords(str(tmp_path))
+    os.remove(os.path.join(str(tmp_path), FiberSetCoords.coords_file))
+
+    fiberset_coords = FiberSetCoords(str(tmp_path))
+    assert np.array_equal(fiberset_coords.offsets, expected.offsets)
+    assert np.array_equal(fiberset_coords.coords, expected.coords)
+    assert np.array_equal(get_z_coords(str(tmp_path), '1.dat'), expected.z(1))
+
+
+def test_columnar_fiber_files(basic_fiberset, tmp_path):
+    """Test that fiber files derived from a columnar fiberset match those written by default.
+
+    :param basic_fiberset: Generic fiberset.
+    :param tmp_path: Temporary directory for the fibersets.
+    """
+    text_path, columnar_path = str(tmp_path / 'text'), str(tmp_path / 'columnar')
+    basic_fiberset.write(WriteMode.DATA, text_path)
+    basic_fiberset.write(WriteMode.DATA, columnar_path, columnar=True)
+    assert sorted(os.listdir(columnar_path)) == [FiberSetCoords.coords_file, FiberSetCoords.offsets_file]
+    assert Simulation.fiber_files(columnar_path) == Simulation.fiber_files(text_path) == ['0.dat', '1.dat', '2.dat']
+
+    FiberSetCoords(columnar_path).write_fiber_files(columnar_path)
+    for fiber_file in Simulation.fiber_files(text_path):
+        with open(os.path.join(text_path, fiber_file)) as text_file:
+            with open(os.path.join(columnar_path, fiber_file)) as derived_file:
+                assert text_file.read() == derived_file.read()
@@ -0,0 +1,31 @@
+"""Tests the query module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import struct
+
+import numpy as np
+
+from src.core.query import Query
+
+
+def test_read_tm_current_matrix(tmp_path):
+    """Test mapping a transmembrane current file written as NEURON Vectors.
+
+    :param tmp_path: Temporary directory for the file.
+    """
+    currents = np.arange(12, dtype=float).reshape(3, 4)  # compartment x time, as written by RunSim.hoc
+    path = tmp_path / 'Imembrane_inner0_fiber0_amp0.dat'
+    with open(path, 'wb') as file:
+        file.write(struct.pack('@iidiidiidii', 1, 4, 5.0, 1, 4, 0.5, 1, 4, 3.0, currents.size, 4))
+        file.write(currents.tobytes())
+
+    tstop, time_vector, current_matrix = Query.read_tm_current_matrix(str(path))
+    assert tstop == 5.0
+    assert np.array_equal(time_vector, [0, 0.5, 1, 1.5])
+    assert isinstance(current_matrix.base, np.memmap)
+    assert np.array_equal(current_matrix, currents.T)
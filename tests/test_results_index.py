@@ -0,0 +1,51 @@
+"""Tests the results_index module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.core.results_index import ResultsIndex
+
+
+def test_update(tmp_path, monkeypatch):
+    """Test that the index only rereads modified outputs and forgets removed ones.
+
+    :param tmp_path: Temporary project directory.
+    :param monkeypatch: Pytest fixture to run from the temporary project directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    outputs_dir = os.path.join('samples', '0', 'models', '1', 'sims', '2', 'n_sims', '0', 'data', 'outputs')
+    os.makedirs(outputs_dir)
+    for name, value in [('thresh_inner0_fiber0.dat', '-0.5\n'), ('thresh_inner0_fiber1.dat', '0.25\n-0.75\n')]:
+        with open(os.path.join(outputs_dir, name), 'w') as file:
+            file.write(value)
+    with open(os.path.join(outputs_dir, 'activation_inner1_fiber0_amp3.dat'), 'w') as file:
+        file.write('2')
+
+    results_index = ResultsIndex()
+    assert results_index.update(0, 1, 2) == 3
+    activations = results_index.values('activation', 0, 1, 2)
+    assert activations[['nsim', 'inner', 'fiber', 'amp', 'value']].values.tolist() == [[0, 1, 0, 3, 2.0]]
+
+    # outputs written before the last update are not read again
+    past = os.path.getmtime(os.path.join(outputs_dir, 'thresh_inner0_fiber0.dat')) - 10
+    for name in os.listdir(outputs_dir):
+        os.utime(os.path.join(outputs_dir, name), (past, past))
+    results_index.connection.execute('UPDATE builds SET indexed_at = ?', (past + 1,))
+    assert results_index.update(0, 1, 2) == 0
+
+    os.remove(os.path.join(outputs_dir, 'thresh_inner0_fiber0.dat'))
+    with open(os.path.join(outputs_dir, 'thresh_inner0_fiber1.dat'), 'w') as file:
+        file.write('-0.125\n')
+    assert results_index.update(0, 1, 2) == 1
+
+    keys = pd.DataFrame({'sample': 0, 'model': 1, 'sim': 2, 'nsim': 0, 'inner': 0, 'fiber': [0, 1]})
+    assert np.array_equal(results_index.lookup('threshold', keys), [np.nan, -0.125], equal_nan=True)
+    results_index.close()
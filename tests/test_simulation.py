@@ -0,0 +1,111 @@
+"""Tests the simulation module.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import numpy as np
+import pytest
+
+from src.core.fiberset import FiberSetCoords
+from src.core.simulation import Simulation
+
+
+@pytest.fixture
+def basic_simulation():
+    """Create a simulation with three bases and no configs.
+
+    :return: Simulation object.
+    """
+    simulation = Simulation(None)
+    simulation.n_bases = 3
+    return simulation
+
+
+def test_weight_bases(basic_simulation):
+    """Test weighting bases with a single set of contact weights.
+
+    :param basic_simulation: Generic simulation.
+    """
+    bases = [np.array([1.0, 2.0]), np.array([3.0, 4.0]), np.array([5.0, 6.0])]
+    assert np.allclose(basic_simulation.weight_bases([1, -1, 0.5], bases), [0.5, 1.0])
+
+
+def test_weight_bases_batch(basic_simulation):
+    """Test weighting bases for many combinations of contact weights in a single call.
+
+    :param basic_simulation: Generic simulation.
+    """
+    bases = np.arange(12, dtype=float).reshape(3, 4)
+    weights = np.array([[1, -1, 0], [0, 0.5, -0.5], [0, 0, 0]])
+    weighted = basic_simulation.weight_bases(weights, bases)
+    assert weighted.shape == (3, 4)
+    for row, combination in enumerate(weights):
+        assert np.allclose(weighted[row], basic_simulation.weight_bases(combination, bases))
+
+
+def test_binary_potentials(tmp_path):
+    """Test that binary potentials inputs are read back per fiber, with their index.
+
+    :param tmp_path: Temporary directory for the inputs.
+    """
+    fibers_ve = [(0, 0, np.linspace(0, 1, 5)), (0, 1, np.arange(3.0)), (1, 0, np.array([-1e-3, 2e-3]))]
+    Simulation.write_binary_potentials(str(tmp_path), 'src', fibers_ve)
+    assert Simulation.read_binary_potentials_index(str(tmp_path)) == {(0, 0): (0, 5), (0, 1): (5, 3), (1, 0): (8, 2)}
+    assert Simulation.input_fibers(str(tmp_path)) == [(0, 0), (0, 1), (1, 0)]
+    for inner, fiber, ve in fibers_ve:
+        assert np.array_equal(Simulation.load_fiber_potentials(str(tmp_path), inner, fiber), ve)
+    assert Simulation.read_binary_potentials_index(str(tmp_path), 'rec') is None
+
+
+def test_interpolate_bases(basic_simulation):
+    """Test that interpolating all bases in one call matches interpolating each weighted combination.
+
+    :param basic_simulation: Generic simulation.
+    """
+    ss_coords = np.linspace(0, 10, 21)
+    ss_bases = np.vstack([np.sin(ss_coords), np.cos(ss_coords), ss_coords**2])
+    fiber_coords = np.array([0.25, 3.3, 7.1, 10.0])
+    weights = np.array([1, -0.5, 0.1])
+    interpolated = basic_simulation.interpolate_2d(fiber_coords, ss_coords, ss_bases)
+    assert interpolated.shape == (3, 4)
+    assert np.allclose(
+        basic_simulation.weight_bases(weights, interpolated),
+        basic_simulation.interpolate_2d(fiber_coords, ss_coords, basic_simulation.weight_bases(weights, ss_bases)),
+    )
+
+
+def test_fiberset_indices(basic_simulation):
+    """Test the lookups between fiber indices and inner/local fiber indices of a fiberset.
+
+    :param basic_simulation: Generic simulation.
+    """
+    out_to_fib = [[[3, 0], [5]], [[]], [[1, 4, 2]]]
+    out_to_in = [[0, 1], [2], [3]]
+    basic_simulation.fiberset_map_pairs = [(out_to_fib, out_to_in)]
+
+    expected = {3: (0, 0), 0: (0, 1), 5: (1, 0), 1: (3, 0), 4: (3, 1), 2: (3, 2)}
+    for fiber_ind, (inner, local_fiber_ind) in expected.items():
+        assert basic_simulation.indices_fib_to_n(0, fiber_ind) == (inner, local_fiber_ind)
+        assert basic_simulation.indices_n_to_fib(0, inner, local_fiber_ind) == fiber_ind
+
+    _, inner_offsets, _ = basic_simulation.fiberset_indices(0)
+    assert np.array_equal(np.diff(inner_offsets), [2, 1, 0, 3])
+    with pytest.raises(IndexError):
+        basic_simulation.indices_n_to_fib(0, 1, 1)
+    with pytest.raises(ValueError):
+        basic_simulation.indices_fib_to_n(0, 6)
+
+
+def test_fiberset_xy(basic_simulation, tmp_path):
+    """Test getting the xy location of each fiber of a fiberset, by inner and local fiber index.
+
+    :param basic_simulation: Generic simulation.
+    :param tmp_path: Temporary directory for the fiberset.
+    """
+    basic_simulation.fiberset_map_pairs = [([[[1], [2, 0]]], [[0, 1]])]
+    FiberSetCoords.write(str(tmp_path), [[[i, -i, z] for z in range(3)] for i in range(3)])
+    inner_fiber_xy = basic_simulation.fiberset_xy(0, str(tmp_path), ['0.dat', '1.dat', '2.dat'])
+    assert np.array_equal(inner_fiber_xy, [[1, 1, 0, 0], [0, 0, 1, -1], [1, 0, 2, -2]])
@@ -0,0 +1,360 @@
+"""Tests the NEURON submission script.
+
+The copyrights of this software are owned by Duke University. Please
+refer to the LICENSE and README.md files for licensing instructions. The
+source code can be found on the following GitHub repository:
+https://github.com/wmglab-duke/ascent
+"""
+
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.neuron import submit
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    """Run from an empty export directory, with an n_sim of a threshold protocol.
+
+    :param tmp_path: Temporary export directory.
+    :param monkeypatch: Pytest fixture to run from the temporary export directory.
+    :yields: The path to the outputs of the n_sim.
+    """
+    monkeypatch.chdir(tmp_path)
+    submit.load_cached.cache_clear()
+    submit.get_activating_function_peaks.cache_clear()
+    output_path = os.path.join('n_sims', '0_0_0_0', 'data', 'outputs')
+    os.makedirs(output_path)
+    with open(os.path.join('n_sims', '0_0_0_0', '0.json'), 'w') as file:
+        json.dump({'protocol': {'mode': 'ACTIVATION_THRESHOLD', 'bounds_search': {'estimate': {}}}}, file)
+    yield output_path
+    submit.load_cached.cache_clear()
+
+
+def write_thresholds(output_path, thresholds):
+    """Write the thresholds of the fibers of an n_sim that already ran.
+
+    :param output_path: The path to the outputs of the n_sim.
+    :param thresholds: A dict of (inner, fiber) -> threshold.
+    """
+    for (inner, fiber), threshold in thresholds.items():
+        np.savetxt(os.path.join(output_path, f'thresh_inner{inner}_fiber{fiber}.dat'), [threshold])
+
+
+def test_estimate_thresholds(export_dir, monkeypatch):
+    """Test that thresholds following the fit power law of the diameter are estimated back from the fibers that ran.
+
+    :param export_dir: The path to the outputs of the n_sim.
+    :param monkeypatch: Pytest fixture to set the peaks of the activating function of the fibers.
+    """
+    # (diameter, maximum of the activating function, maximum of its negative); cathodic thresholds follow the latter
+    peaks = {
+        (0, fiber): (diameter, 0.5, trough)
+        for fiber, (diameter, trough) in enumerate(
+            [(5.7, 1.0), (5.7, 2.0), (8.7, 1.5), (10.0, 0.8), (10.0, 3.0), (8.7, 0.0)]
+        )
+    }
+    monkeypatch.setattr(submit, 'get_activating_function_peaks', lambda sim_name: peaks)
+    thresholds = {key: -2.0 * diameter**-1.5 / trough for key, (diameter, _, trough) in peaks.items() if trough > 0}
+    write_thresholds(export_dir, {key: thresholds[key] for key in [(0, 0), (0, 2), (0, 3)]})
+
+    sign, slope, intercept = submit.fit_threshold_estimator('0_0_0_0')
+    assert sign == -1
+    assert np.isclose(slope, -1.5)
+    assert np.isclose(intercept, np.log(2.0))
+
+    # the fiber without a depolarizing peak is not estimated
+    estimates = submit.estimate_thresholds('0_0_0_0', '0_0_0_0')
+    assert estimates.keys() == thresholds.keys()
+    assert np.allclose([estimates[key] for key in thresholds], list(thresholds.values()))
+
+
+def test_estimate_thresholds_no_drive(export_dir, monkeypatch):
+    """Test that thresholds are not estimated from, or for, fibers without a depolarizing peak.
+
+    :param export_dir: The path to the outputs of the n_sim.
+    :param monkeypatch: Pytest fixture to set the peaks of the activating function of the fibers.
+    """
+    peaks = {(0, 0): (5.7, 1.0, 0.0), (0, 1): (5.7, 0.0, 2.0), (0, 2): (5.7, 2.0, 1.0)}
+    monkeypatch.setattr(submit, 'get_activating_function_peaks', lambda sim_name: peaks)
+    assert submit.fit_threshold_estimator('0_0_0_0') is None
+
+    # a cathodic threshold of a fiber without a depolarizing peak for it does not calibrate the estimates
+    write_thresholds(export_dir, {(0, 0): -0.5})
+    assert submit.fit_threshold_estimator('0_0_0_0') is None
+    assert submit.estimate_thresholds('0_0_0_0', '0_0_0_0') is None
+
+    # an anodic threshold does, for the fibers with a depolarizing peak for it
+    write_thresholds(export_dir, {(0, 0): 0.5})
+    assert submit.estimate_thresholds('0_0_0_0', '0_0_0_0') == {(0, 0): 0.5, (0, 2): 0.25}
+
+
+def test_report_estimated_thresholds(export_dir, monkeypatch, capsys):
+    """Test the estimated recruitment of an n_sim, and that an n_sim without estimates is skipped.
+
+    :param export_dir: The path to the outputs of the n_sim.
+    :param monkeypatch: Pytest fixture to set the peaks of the activating function of the fibers.
+    :param capsys: Pytest fixture to capture the report.
+    """
+    peaks = {
+        '0_0_0_0': {(0, fiber): (5.7, 0.0, trough) for fiber, trough in enumerate([1.0, 2.0, 4.0, 0.5])},
+        '0_0_1_0': {(0, 0): (5.7, 1.0, 0.0)},
+    }
+    monkeypatch.setattr(submit, 'get_activating_function_peaks', lambda sim_name: peaks[sim_name])
+    write_thresholds(export_dir, {(0, 0): -0.4})
+    os.makedirs(os.path.join('n_sims', '0_0_1_0'))
+    with open(os.path.join('n_sims', '0_0_1_0', '0.json'), 'w') as file:
+        json.dump({'protocol': {'mode': 'ACTIVATION_THRESHOLD', 'bounds_search': {'estimate': {'sim': 0}}}}, file)
+
+    submit.report_estimated_thresholds(['0_0_0_0', '0_0_1_0'])
+    report = capsys.readouterr().out.splitlines()
+    assert report[0].endswith('recruiting 10/50/90%: -0.1, -0.2, -0.8')
+    assert report[1].startswith('0_0_1_0: no fiber has a depolarizing peak')
+    estimates = pd.read_csv(os.path.join('n_sims', '0_0_0_0', 'estimated_thresholds.csv'))
+    assert estimates['fiber'].tolist() == [2, 1, 0, 3]
+    assert np.allclose(estimates['recruitment'], [0.25, 0.5, 0.75, 1])
+    assert not os.path.exists(os.path.join('n_sims', '0_0_1_0', 'estimated_thresholds.csv'))
+
+
+def test_select_estimate_seed_fibers():
+    """Test that seeds are the fibers with the median peak of the smallest, median, and largest diameters."""
+    peaks = [
+        (10.0, 1.0, 0.5),
+        (5.7, 0.2, 0.1),
+        (8.7, 3.0, 0.0),
+        (5.7, 0.1, 0.9),
+        (8.7, 0.5, 0.5),
+        (5.7, 0.5, 0.1),
+        (7.3, 1.0, 1.0),
+        (8.7, 0.0, 4.0),
+    ]
+    # of the diameters 5.7, 7.3, 8.7 and 10.0, the fibers of 5.7, 8.7 and 10.0 with the median of max(peak, trough)
+    assert submit.select_estimate_seed_fibers(peaks) == [5, 2, 0]
+    assert submit.select_estimate_seed_fibers([(5.7, 1.0, 0.0)] * 2) == [1]
+
+
+def write_nsim(sim_name, protocol, n_fiber_coords):
+    """Write the configuration and inputs of an n_sim of MRG fibers of 5.7 um, with text potentials.
+
+    :param sim_name: The string name of the n_sim.
+    :param protocol: The protocol of the n_sim.
+    :param n_fiber_coords: A dict of (inner, fiber) -> the number of coordinates of the fiber.
+    """
+    inputs_path = os.path.join('n_sims', sim_name, 'data', 'inputs')
+    os.makedirs(inputs_path, exist_ok=True)
+    with open(os.path.join('n_sims', sim_name, f"{sim_name.split('_')[-1]}.json"), 'w') as file:
+        json.dump({'fibers': {'mode': 'MRG_DISCRETE', 'z_parameters': {'diameter': 5.7}}, 'protocol': protocol}, file)
+    with open(os.path.join(inputs_path, 'waveform.dat'), 'w') as file:
+        file.write('0.005\n2\n')
+    for (inner, fiber), n_coords in n_fiber_coords.items():
+        np.savetxt(os.path.join(inputs_path, f'src_inner{inner}_fiber{fiber}.dat'), np.r_[n_coords, np.zeros(n_coords)])
+
+
+@pytest.fixture
+def fiber_z_config(export_dir, monkeypatch):
+    """Copy the fiber models and (empty) compiled NEURON mechanisms to the export directory, on a UNIX-like OS.
+
+    :param export_dir: The path to the outputs of the n_sim.
+    :param monkeypatch: Pytest fixture to set the OS.
+    """
+    os.makedirs(os.path.join('config', 'system'))
+    with open(os.path.join(os.path.dirname(__file__), '..', 'config', 'system', 'fiber_z.json')) as file:
+        fiber_z = file.read()
+    with open(os.path.join('config', 'system', 'fiber_z.json'), 'w') as file:
+        file.write(fiber_z)
+    os.makedirs(os.path.join('MOD_Files', 'x86_64'))
+    open(os.path.join('MOD_Files', 'x86_64', 'special'), 'w').close()
+    submit.get_thresh_bounds.cache_clear()
+    monkeypatch.setattr(submit, 'OS', 'UNIX-LIKE')
+
+
+def test_make_fiber_batches():
+    """Test that fibers are packed longest first, a fiber longer than the target alone, and unestimated fibers last."""
+    runtimes = [1.0, 5.0, 2.0, None, 2.0, 1.5]
+    runfibers = [
+        {'job_number': job, **({'est_runtime': runtime} if runtime is not None else {})}
+        for job, runtime in enumerate(runtimes)
+    ]
+    tasks = submit.make_fiber_batches(runfibers, 4.0)
+    assert [(task['job_number'], [fiber['job_number'] for fiber in task['batch']]) for task in tasks] == [
+        (1, []),
+        (2, [4]),
+        (5, [0]),
+        (3, []),
+    ]
+    assert [task['est_runtime'] for task in tasks] == [5.0, 4.0, 2.5, 0]
+
+
+def test_make_fiber_tasks_batches(fiber_z_config):
+    """Test that the other fibers of a batch are written in the order FiberBatch.hoc reads them.
+
+    :param fiber_z_config: Fixture with the fiber models.
+    """
+    protocol = {
+        'mode': 'ACTIVATION_THRESHOLD',
+        'bounds_search': {'top': -1, 'bottom': -0.01},
+        'termination_criteria': {'mode': 'PERCENT_DIFFERENCE', 'percent': 1},
+    }
+    n_fiber_coords = {(0, 0): 441, (0, 1): 221, (1, 0): 331, (1, 1): 111, (1, 2): 221}
+    write_nsim('0_0_0_0', protocol, n_fiber_coords)
+    runfibers = [
+        {'job_number': job, 'cuff_type': ['src'], 'inner': inner, 'fiber': fiber}
+        for job, (inner, fiber) in enumerate(n_fiber_coords)
+    ]
+    submission_list = {'0_0_0_0': runfibers}
+
+    # the estimated runtimes are proportional to the number of coordinates (same time steps and bounds)
+    runtime = submit.DEFAULT_RUNTIME_SCALE * 400 * submit.get_protocol_runs({'protocol': protocol}, -1, -0.01)
+    submit.make_fiber_tasks(submission_list, 'local', batch_runtime=560 * runtime)
+    tasks = submission_list['0_0_0_0']
+    assert [(task['job_number'], [fiber['job_number'] for fiber in task['batch']]) for task in tasks] == [
+        (0, []),
+        (2, [1]),
+        (4, [3]),
+    ]
+    assert np.allclose([task['est_runtime'] for task in tasks], np.array([441, 552, 332]) * runtime)
+
+    start_scripts = os.path.join('n_sims', '0_0_0_0', 'start_scripts')
+    assert sorted(os.listdir(start_scripts)) == ['batch_2.dat', 'batch_4.dat'] + [f'start_{job}.sh' for job in range(5)]
+    with open(os.path.join(start_scripts, 'start_2.sh')) as file:
+        assert 'fiber_batch_fname=\\"start_scripts/batch_2.dat\\"' in file.read()
+    with open(os.path.join(start_scripts, 'start_0.sh')) as file:
+        assert 'fiber_batch_fname' not in file.read()
+
+    with open(os.path.join(os.path.dirname(__file__), '..', 'src', 'neuron', 'HOC_Files', 'FiberBatch.hoc')) as file:
+        hoc_order = re.findall(r'^\s*(\w+)\s*= fiber_batch_file\.scanvar\(\)', file.read(), flags=re.M)
+    assert hoc_order[0] == 'n_fibers'
+    with open(os.path.join(start_scripts, 'batch_4.dat')) as file:
+        assert int(file.readline()) == 1
+        values = dict(zip(hoc_order[1:], file.readline().split()))
+    assert values == {
+        'inner_ind': '1',
+        'fiber_ind': '1',
+        'stimamp_top': '-1',
+        'stimamp_bottom': '-0.01',
+        'fiberD': '5.700000',
+        'deltaz': '500.0000',
+        'axonnodes': '11',
+    }
+
+
+def test_get_neighbor_bounds():
+    """Test that the bounds of a fiber are around the inverse distance weighted thresholds of its nearest neighbors."""
+    neighbor_data = {
+        'count': 2,
+        'margin': 0.1,
+        'xy': {(0, 0): (0, 0), (0, 1): (3, 0), (0, 2): (1, 0), (1, 0): (0, 0)},
+        'inners': {0: np.array([[1, 0, -1.0], [2, 0, -2.0], [10, 0, -9.0]])},
+    }
+    assert np.allclose(submit.get_neighbor_bounds(neighbor_data, 0, 0), np.array([1.1, 0.9]) * -4 / 3)
+    assert np.allclose(submit.get_neighbor_bounds(neighbor_data, 0, 1), np.array([1.1, 0.9]) * -5 / 3)
+    # a neighbor at the location of the fiber
+    assert np.allclose(submit.get_neighbor_bounds(neighbor_data, 0, 2), [-1.1, -0.9])
+    # no neighbor ran in the inner, or the fiber has no location
+    assert submit.get_neighbor_bounds(neighbor_data, 1, 0) == (None, None)
+    assert submit.get_neighbor_bounds(neighbor_data, 0, 3) == (None, None)
+    assert submit.get_neighbor_bounds(None, 0, 0) == (None, None)
+
+
+def test_make_fiber_tasks_neighbors(fiber_z_config):
+    """Test that fibers of inners with a fiber that already ran have its bounds, and the others the standard bounds.
+
+    :param fiber_z_config: Fixture with the fiber models.
+    """
+    protocol = {
+        'mode': 'ACTIVATION_THRESHOLD',
+        'bounds_search': {'top': -1, 'bottom': -0.01, 'neighbors': {'count': 1, 'margin': 20}},
+        'termination_criteria': {'mode': 'PERCENT_DIFFERENCE', 'percent': 1},
+    }
+    xy = {(0, 0): (0, 0), (0, 1): (1, 1), (1, 0): (5, 5)}
+    write_nsim('0_0_0_0', protocol, {key: 221 for key in xy})
+    fiber_xy = [[inner, fiber, x, y] for (inner, fiber), (x, y) in xy.items()]
+    np.savetxt(os.path.join('n_sims', '0_0_0_0', 'data', 'inputs', 'inner_fiber_xy.dat'), fiber_xy)
+    write_thresholds(os.path.join('n_sims', '0_0_0_0', 'data', 'outputs'), {(0, 0): -0.5})
+
+    runfibers = [
+        {'job_number': job, 'cuff_type': ['src'], 'inner': inner, 'fiber': fiber}
+        for job, (inner, fiber) in [(1, (0, 1)), (2, (1, 0))]
+    ]
+    submit.make_fiber_tasks({'0_0_0_0': runfibers}, 'local', manifest=True)
+    tasks = pd.read_csv(os.path.join('n_sims', '0_0_0_0', 'fiber_tasks.csv'), index_col='job_number')
+    assert np.allclose(tasks.loc[1, ['stimamp_top', 'stimamp_bottom']], [-0.6, -0.4])
+    assert np.allclose(tasks.loc[2, ['stimamp_top', 'stimamp_bottom']], [-1, -0.01])
+
+    # the inner with no fiber that already ran has seeds, run first
+    seed_list, other_list = submit.split_seed_fibers({'0_0_0_0': runfibers})
+    assert [fiber['job_number'] for fiber in seed_list['0_0_0_0']] == [2]
+    assert [fiber['job_number'] for fiber in other_list['0_0_0_0']] == [1]
+
+
+def test_select_seed_fibers():
+    """Test that seeds spread from the center of the inner, with the square root of the number of fibers."""
+    grid = [(x, y) for x in range(3) for y in range(3)]
+    assert submit.select_seed_fibers(grid) == [4, 0, 2]
+    assert submit.select_seed_fibers([(0, 0)]) == [0]
+    line = [(x, 0) for x in range(10)]
+    seeds = submit.select_seed_fibers(line)
+    assert len(seeds) == 4
+    assert {0, 9} <= set(seeds)
+
+
+@pytest.mark.parametrize(
+    'protocol, top, bottom, runs',
+    [
+        ({'mode': 'FINITE_AMPLITUDES', 'amplitudes': [0.1, 0.2, 0.3]}, 0, 0, 3),
+        ({'mode': 'ACTIVATION_THRESHOLD'}, -1, -0.01, 9),
+        ({'mode': 'ACTIVATION_THRESHOLD', 'termination_criteria': {'percent': 10}}, -1, -0.5, 5),
+        (
+            {'mode': 'BLOCK_THRESHOLD', 'termination_criteria': {'mode': 'ABSOLUTE_DIFFERENCE', 'tolerance': 1e-3}},
+            0.2,
+            0.1,
+            9,
+        ),
+        ({'mode': 'ACTIVATION_THRESHOLD'}, -1, -0.995, 2),
+        ({'mode': 'ACTIVATION_THRESHOLD'}, -1, -1, 2),
+    ],
+)
+def test_get_protocol_runs(protocol, top, bottom, runs):
+    """Test the number of NEURON runs of the protocol modes: one per amplitude, or per halving of the bounds.
+
+    :param protocol: The protocol of the n_sim.
+    :param top: The upper threshold bound of the fiber.
+    :param bottom: The lower threshold bound of the fiber.
+    :param runs: The expected number of NEURON runs.
+    """
+    assert submit.get_protocol_runs({'protocol': protocol}, top, bottom) == runs
+
+
+def test_get_runtime_scale(fiber_z_config):
+    """Test that the runtime per unit of cost is the median of that of the fibers that saved their runtimes.
+
+    :param fiber_z_config: Fixture with the fiber models.
+    """
+    protocol = {
+        'mode': 'ACTIVATION_THRESHOLD',
+        'bounds_search': {'top': -1, 'bottom': -0.01},
+        'termination_criteria': {'mode': 'PERCENT_DIFFERENCE', 'percent': 1},
+    }
+    n_fiber_coords = {(0, 0): 221, (0, 1): 441, (1, 0): 111}
+    write_nsim('0_0_0_0', protocol, n_fiber_coords)
+    fibers_path = os.path.join('n_sims', '0_0_0_0', 'data', 'inputs')
+    output_path = os.path.join('n_sims', '0_0_0_0', 'data', 'outputs')
+    with open(os.path.join('n_sims', '0_0_0_0', '0.json')) as file:
+        sim_config = json.load(file)
+    assert submit.get_runtime_scale('0_0_0_0', sim_config, fibers_path, output_path, None, 400) is None
+
+    # 9 runs of 400 time steps; the runtimes of a fiber are summed over its amplitudes
+    costs = {key: n_coords * 400 * 9 for key, n_coords in n_fiber_coords.items()}
+    np.savetxt(os.path.join(output_path, 'runtime_inner0_fiber0_amp0.dat'), [0.5 * costs[(0, 0)] * 1e-5])
+    np.savetxt(os.path.join(output_path, 'runtime_inner0_fiber0_amp1.dat'), [0.5 * costs[(0, 0)] * 1e-5])
+    np.savetxt(os.path.join(output_path, 'runtime_inner0_fiber1_amp0.dat'), [costs[(0, 1)] * 2e-5])
+    np.savetxt(os.path.join(output_path, 'runtime_inner1_fiber0_amp0.dat'), [costs[(1, 0)] * 3e-5])
+    assert np.isclose(submit.get_runtime_scale('0_0_0_0', sim_config, fibers_path, output_path, None, 400), 2e-5)
+    assert np.isclose(
+        submit.get_runtime_scale('0_0_0_0', sim_config, fibers_path, output_path, None, 400, n_max=2), 1.5e-5
+    )
@@ -6,8 +6,11 @@ source code can be found on the following GitHub repository:
 https://github.com/wmglab-duke/ascent
 """
 
+import random
+
 import numpy as np
 import pytest
+from shapely.geometry import Point
 
 from src.core.trace import Trace
 
@@ -43,3 +46,22 @@ def test_append(basic_trace):
         basic_trace.points,
         [(0.0, 0.0, 0.0), (0.0, 1.0, 0.0), (1.0, 1.0, 0.0), (2.0, -1.0, 0.0), (0.0, 0.0, 0.0), (1.0, 1.0, 0.0)],
     )
+
+
+def test_random_points(basic_trace):
+    """Test that random points are within the trace and match drawing one coordinate at a time.
+
+    :param basic_trace: Generic trace.
+    """
+    points = basic_trace.random_points(50, my_xy_seed=7)
+    assert len(points) == 50
+    assert points == basic_trace.random_points(50, my_xy_seed=7)
+
+    min_x, min_y, max_x, max_y = basic_trace.polygon().bounds
+    random.seed(7)
+    expected = []
+    while len(expected) < 50:
+        point = (random.random() * (max_x - min_x) + min_x, random.random() * (max_y - min_y) + min_y)
+        if Point(point).within(basic_trace.polygon()):
+            expected.append(point)
+    assert points == expected
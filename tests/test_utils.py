@@ -11,7 +11,7 @@ import pickle
 
 import pytest
 
-from src.utils import Configurable, Saveable
+from src.utils import Configurable, ObjectCache, Saveable
 
 saver = Saveable()
 configurator = Configurable()
@@ -35,3 +35,29 @@ def test_saveable():
 
 def test_configurable():
     """Tests the Configurable class."""
+
+
+def test_object_cache(tmp_path):
+    """Tests the ObjectCache class.
+
+    :param tmp_path: Temporary directory for the pickled objects.
+    """
+    paths = [str(tmp_path / f'{i}.obj') for i in range(3)]
+    for i, path in enumerate(paths):
+        with open(path, 'wb') as file:
+            pickle.dump({'index': i}, file)
+
+    cache = ObjectCache(maxsize=2)
+    first = cache.load(paths[0])
+    # test that an unmodified object is not loaded again
+    assert cache.load(paths[0]) is first
+    # test that the least recently used object is evicted
+    cache.load(paths[1])
+    cache.load(paths[2])
+    assert len(cache) == 2
+    assert cache.load(paths[0]) is not first
+    # test that a modified object is loaded again
+    with open(paths[0], 'wb') as file:
+        pickle.dump({'index': -1}, file)
+    os.utime(paths[0], ns=(0, os.stat(paths[0]).st_mtime_ns + 1))
+    assert cache.load(paths[0]) == {'index': -1}